@@ -0,0 +1 @@
+"""Benchmarks and load tools for the market data pipeline (run from the repo root)."""
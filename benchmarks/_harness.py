@@ -0,0 +1,161 @@
+"""
+Shared plumbing for the benchmarks: importing the two services, local
+stand-ins for Redis and Postgres, an in-process gateway server, and result
+files.
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+GATEWAY_DIR = ROOT / "services" / "api-gateway"
+GENERATOR_SRC = ROOT / "services" / "market-feed-generator" / "src"
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+
+def load_gateway():
+    """Import the gateway as ``src.main`` the same way uvicorn does in the container"""
+    if str(GATEWAY_DIR) not in sys.path:
+        sys.path.insert(0, str(GATEWAY_DIR))
+    import src.main as gateway
+    # Every load client connects from the same address
+    gateway.rate_limiter.enabled = False
+    return gateway
+
+
+def load_generator():
+    """Import the feed generator's main module under a non-clashing name"""
+    if "feed_generator" in sys.modules:
+        return sys.modules["feed_generator"]
+    if str(GENERATOR_SRC) not in sys.path:
+        sys.path.append(str(GENERATOR_SRC))
+    spec = importlib.util.spec_from_file_location("feed_generator", GENERATOR_SRC / "main.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["feed_generator"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+async def make_redis(url=None):
+    """A real Redis client when ``url`` is given, otherwise an in-process fake"""
+    if url:
+        import redis.asyncio as redis
+        return await redis.from_url(url)
+    import fakeredis.aioredis
+    return fakeredis.aioredis.FakeRedis()
+
+
+class _StandInStatement:
+    def __init__(self, database, latency):
+        self.database = database
+        self.latency = latency
+
+    async def executemany(self, rows):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.database.rows += len(rows)
+        self.database.batches += 1
+
+    async def fetchval(self, *args):
+        return 1
+
+
+class StandInDatabase:
+    """Accepts the gateway's batched inserts without a Postgres server.
+
+    ``batch_latency`` simulates the round trip of one executemany call.
+    """
+
+    def __init__(self, batch_latency: float = 0.0):
+        self.rows = 0
+        self.batches = 0
+        statement = _StandInStatement(self, batch_latency)
+        self.prepared = {
+            "ping": statement,
+            "insert_trade": statement,
+            "insert_quote": statement,
+        }
+
+    @asynccontextmanager
+    async def write(self, statement_timeout_ms=None):
+        yield self
+
+    read = write
+
+    async def close(self):
+        pass
+
+
+@asynccontextmanager
+async def gateway_server(gateway, host: str = "127.0.0.1", port: int = 8765, backlog: int = 2048):
+    """Serve the gateway app in this event loop without running its startup hooks"""
+    import uvicorn
+    config = uvicorn.Config(
+        gateway.app, host=host, port=port, backlog=backlog, lifespan="off", log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    server.install_signal_handlers = lambda: None
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"ws://{host}:{port}"
+    finally:
+        server.should_exit = True
+        await task
+
+
+def percentiles(samples, points=(50, 99, 99.9)) -> dict:
+    """Nearest-rank percentiles, keyed like p50/p99/p999"""
+    if not samples:
+        return {f"p{str(p).replace('.', '')}": None for p in points}
+    ordered = sorted(samples)
+    result = {}
+    for p in points:
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+        result[f"p{str(p).replace('.', '')}"] = ordered[index]
+    return result
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux), or 0 where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(name: str, params: dict, metrics: dict, output=None) -> Path:
+    """Write one machine-readable result file and return its path"""
+    record = {
+        "benchmark": name,
+        "timestamp": datetime.utcnow().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "metrics": metrics,
+    }
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"{name}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    output = Path(output)
+    output.write_text(json.dumps(record, indent=2))
+    return output
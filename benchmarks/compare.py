@@ -0,0 +1,62 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+
+Exits non-zero if any metric got worse by more than the threshold, so it can
+gate CI.
+"""
+import argparse
+import json
+import sys
+
+# Metrics where a larger value is better; everything else is lower-is-better
+HIGHER_IS_BETTER = ("_per_sec", "throughput")
+
+
+def flatten(metrics: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(baseline: dict, candidate: dict, threshold: float):
+    """Yield (metric, old, new, relative change, regressed) for shared metrics"""
+    old, new = flatten(baseline["metrics"]), flatten(candidate["metrics"])
+    for name in sorted(old.keys() & new.keys()):
+        if old[name] == 0:
+            continue
+        change = (new[name] - old[name]) / abs(old[name])
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        yield name, old[name], new[name], change, worse > threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline["params"] != candidate["params"]:
+        print("⚠️ Parameters differ between runs; comparison may be meaningless")
+
+    regressions = 0
+    for name, old, new, change, regressed in compare(baseline, candidate, args.threshold):
+        marker = "❌" if regressed else "  "
+        print(f"{marker} {name:40s} {old:14.3f} → {new:14.3f} ({change:+.1%})")
+        regressions += regressed
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
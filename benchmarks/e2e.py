@@ -0,0 +1,211 @@
+"""
+End-to-end latency benchmark.
+
+Drives ``MarketDataGenerator`` at a fixed message rate into Redis (a local
+server or an in-process fake), through the gateway's fan-out hub and
+``/ws/{symbol}`` path, to N simulated WebSocket clients, and through the
+ingestion writer into Postgres (or a stand-in).
+
+    python -m benchmarks.e2e --rate 2000 --clients 200 --duration 20
+
+Everything runs in one process and one event loop, so the simulated clients
+share the CPU with the gateway; compare results only between runs with the
+same parameters on the same machine.
+"""
+from array import array
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+
+import websockets
+
+from ._harness import (
+    StandInDatabase,
+    gateway_server,
+    load_gateway,
+    load_generator,
+    make_redis,
+    percentiles,
+    rss_bytes,
+    write_results,
+)
+
+
+class Recorder:
+    """Collects delivery latencies while measuring is switched on"""
+
+    def __init__(self):
+        self.measuring = False
+        self.latencies = array("d")
+        self.delivered = 0
+
+    def record(self, text: str):
+        if not self.measuring:
+            return
+        message = json.loads(text)
+        timestamp = message.get("timestamp")
+        if timestamp is None or message.get("type") == "snapshot":
+            return
+        sent = datetime.fromisoformat(timestamp)
+        self.latencies.append((datetime.utcnow() - sent).total_seconds() * 1000)
+        self.delivered += 1
+
+
+async def run_client(uri: str, recorder: Recorder, connected: asyncio.Event, counter: list):
+    async with websockets.connect(uri, ping_interval=None, max_queue=None) as ws:
+        counter[0] += 1
+        if counter[0] == counter[1]:
+            connected.set()
+        async for text in ws:
+            recorder.record(text)
+
+
+async def drive(generator, rate: float, stop: asyncio.Event, published: list, book_share: float = 0.0):
+    """Publish a quote per symbol tick (plus a trade with the generator's 70% probability) at ``rate`` msg/s
+
+    With ``book_share`` that fraction of the ticks are order book updates instead.
+    """
+    symbols = generator.symbols
+    start = time.perf_counter()
+    index = 0
+    while not stop.is_set():
+        due = int((time.perf_counter() - start) * rate) - published[0]
+        while due > 0:
+            symbol = symbols[index % len(symbols)]
+            index += 1
+            if book_share and random.random() < book_share:
+                book = generator.generate_book(symbol)
+                messages = [book] if book is not None else []
+            else:
+                messages = [generator.generate_quote(symbol)]
+                if random.random() < 0.7:
+                    trade = generator.generate_trade(symbol)
+                    generator.base_prices[symbol] = trade["price"]
+                    messages.append(trade)
+                generator.update_price(symbol)
+            for message in messages:
+                await generator.publish(symbol, message)
+            published[0] += len(messages)
+            due -= max(len(messages), 1)
+        await asyncio.sleep(0.001)
+
+
+async def run(args) -> dict:
+    random.seed(args.seed)
+    gateway = load_gateway()
+    generator = load_generator().MarketDataGenerator()
+
+    redis_client = await make_redis(args.redis_url)
+    generator.redis_client = redis_client
+    gateway.redis_client = redis_client
+
+    if args.database_url:
+        from src.config import Settings
+        from src.db import ConnectionManager
+        database = ConnectionManager(Settings(database_url=args.database_url))
+        await database.connect()
+    else:
+        database = StandInDatabase(args.db_latency)
+    gateway.db = database
+    gateway.writer = gateway.IngestionWriter(database, args.batch_size, args.flush_interval)
+    gateway.start_pipeline()
+
+    recorder = Recorder()
+    async with gateway_server(gateway, port=args.port) as base:
+        # Connect clients round-robin over the symbols and measure the heap they add
+        connected = asyncio.Event()
+        counter = [0, args.clients]
+        tracemalloc.start()
+        rss_before = rss_bytes()
+        heap_before = tracemalloc.get_traced_memory()[0]
+        clients = [
+            asyncio.create_task(run_client(
+                f"{base}/ws/{generator.symbols[i % len(generator.symbols)]}?channel={args.channel}",
+                recorder, connected, counter
+            ))
+            for i in range(args.clients)
+        ]
+        await asyncio.wait_for(connected.wait(), timeout=60)
+        heap_per_connection = (tracemalloc.get_traced_memory()[0] - heap_before) / args.clients
+        rss_per_connection = (rss_bytes() - rss_before) / args.clients
+        tracemalloc.stop()
+
+        # Wait for the lease so the measured window includes ingestion
+        while not gateway.lease.held:
+            await asyncio.sleep(0.05)
+
+        stop = asyncio.Event()
+        published = [0]
+        driver = asyncio.create_task(drive(generator, args.rate, stop, published, args.book_share))
+
+        await asyncio.sleep(args.warmup)
+        recorder.measuring = True
+        published_start = published[0]
+        rows_start = gateway.writer.rows_written
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+
+        await asyncio.sleep(args.duration)
+
+        recorder.measuring = False
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        ticks = published[0] - published_start
+        rows = gateway.writer.rows_written - rows_start
+
+        stop.set()
+        await driver
+        for client in clients:
+            client.cancel()
+        await asyncio.gather(*clients, return_exceptions=True)
+
+    for component in (
+        gateway.hub, gateway.lease, gateway.writer, gateway.feed_monitor, gateway.correlation_engine,
+        gateway.summary_engine, gateway.cluster_stats,
+    ):
+        await component.stop()
+    await database.close()
+
+    return {
+        "latency_ms": percentiles(recorder.latencies),
+        "published_per_sec": ticks / wall,
+        "delivered_per_sec": recorder.delivered / wall,
+        "cpu_us_per_tick": cpu / ticks * 1e6 if ticks else None,
+        "heap_bytes_per_connection": heap_per_connection,
+        "rss_bytes_per_connection": rss_per_connection,
+        "ingested_rows_per_sec": rows / wall,
+        "messages_dropped": gateway.hub.dropped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=1000, help="published messages per second")
+    parser.add_argument("--clients", type=int, default=100, help="simulated WebSocket clients")
+    parser.add_argument("--book-share", type=float, default=0.0, help="fraction of symbol ticks that are book updates")
+    parser.add_argument("--channel", default="market", choices=("market", "book"), help="channel the clients stream")
+    parser.add_argument("--duration", type=float, default=10, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2, help="unmeasured seconds before measuring")
+    parser.add_argument("--redis-url", help="use a real Redis instead of the in-process fake")
+    parser.add_argument("--database-url", help="ingest into a real Postgres instead of the stand-in")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="stand-in seconds per insert batch")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--flush-interval", type=float, default=0.1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/e2e-<time>.json)")
+    args = parser.parse_args()
+
+    metrics = asyncio.run(run(args))
+    params = {k: v for k, v in vars(args).items() if k != "output"}
+    path = write_results("e2e", params, metrics, args.output)
+    print(json.dumps(metrics, indent=2))
+    print(f"📄 Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
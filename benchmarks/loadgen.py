@@ -0,0 +1,342 @@
+"""
+Many-client WebSocket load generator.
+
+Opens up to tens of thousands of ``/ws/{symbol}`` subscribers from one
+machine, spread over several client processes, and reports connect latency,
+publish-to-deliver latency and drops:
+
+    python -m benchmarks.loadgen --clients 20000 --processes 4 --ramp 30 --duration 30
+
+Without ``--target`` it first starts ``benchmarks.serve`` (gateway plus local
+stand-ins) in a subprocess, so the gateway gets its own core. Point
+``--target`` at an already running gateway to load that instead.
+
+Drops are counted two ways: the server's own ``messages_dropped`` total from
+``/api/cluster``, and per client from gaps in the per-symbol ``seq``, which
+splits them between normal and slow consumers.
+"""
+from array import array
+from datetime import datetime
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+
+from ._harness import ROOT, percentiles, write_results
+
+DEFAULT_SYMBOLS = "AAPL,GOOGL,MSFT,AMZN,TSLA"
+_EPOCH = datetime(1970, 1, 1)
+# Latency samples kept per client process (reservoir), to bound memory and IPC
+MAX_SAMPLES = 200_000
+TIMESTAMP_KEY = '"timestamp": "'
+SEQ_KEY = ', "seq": '
+
+
+def assign_symbols(symbols, clients: int, distribution: str, zipf_s: float, seed: int):
+    """Symbol for each client index: round-robin, or Zipf-weighted by list order"""
+    if distribution == "uniform":
+        return [symbols[i % len(symbols)] for i in range(clients)]
+    weights = [1 / rank ** zipf_s for rank in range(1, len(symbols) + 1)]
+    return random.Random(seed).choices(symbols, weights, k=clients)
+
+
+def scan(text: str):
+    """(timestamp, seq) of a live frame without a full JSON parse; None for snapshots"""
+    if text.startswith('{"type": "snapshot"'):
+        return None
+    start = text.find(TIMESTAMP_KEY)
+    cut = text.rfind(SEQ_KEY)
+    if start < 0 or cut < 0:
+        # Compact (delta) or unexpected framing
+        message = json.loads(text)
+        if message.get("type") == "snapshot":
+            return None
+        return message.get("timestamp"), message.get("seq")
+    start += len(TIMESTAMP_KEY)
+    return text[start:text.index('"', start)], int(text[cut + len(SEQ_KEY):-1])
+
+
+class GroupStats:
+    """Delivery accounting for one consumer group (normal or slow) in one process"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.latencies = array("d")
+        self.seen = 0
+        self.delivered = 0
+        self.gap_drops = 0
+
+    def sample(self, latency_ms: float):
+        # Reservoir sampling keeps an unbiased subset once MAX_SAMPLES is reached
+        self.seen += 1
+        if len(self.latencies) < MAX_SAMPLES:
+            self.latencies.append(latency_ms)
+        else:
+            slot = self.rng.randrange(self.seen)
+            if slot < MAX_SAMPLES:
+                self.latencies[slot] = latency_ms
+
+    def result(self) -> dict:
+        return {
+            "latencies": self.latencies.tobytes(),
+            "delivered": self.delivered,
+            "gap_drops": self.gap_drops,
+        }
+
+
+class Client:
+    __slots__ = ("uri", "due", "slow", "local_addr")
+
+    def __init__(self, uri: str, due: float, slow: bool, local_addr):
+        self.uri = uri
+        self.due = due
+        self.slow = slow
+        self.local_addr = local_addr
+
+
+async def run_client(client: Client, args, window: tuple, groups: dict, outcome: dict):
+    delay = client.due - time.time()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    options = {
+        "ping_interval": None,
+        "max_queue": args.client_queue,
+        "compression": "deflate" if args.deflate else None,
+        "open_timeout": args.connect_timeout,
+    }
+    if client.local_addr:
+        options["local_addr"] = client.local_addr
+    started = time.perf_counter()
+    try:
+        ws = await websockets.connect(client.uri, **options)
+    except Exception as e:
+        outcome["failures"][type(e).__name__] = outcome["failures"].get(type(e).__name__, 0) + 1
+        return
+    outcome["connect_ms"].append((time.perf_counter() - started) * 1000)
+
+    stats = groups["slow" if client.slow else "normal"]
+    measure_start, measure_end = window
+    last_seq = None
+    try:
+        async for text in ws:
+            now = time.time()
+            if now >= measure_end:
+                break
+            frame = scan(text)
+            if frame is None:
+                continue
+            timestamp, seq = frame
+            if now >= measure_start:
+                if last_seq is not None and seq is not None and seq > last_seq + 1:
+                    stats.gap_drops += seq - last_seq - 1
+                stats.delivered += 1
+                if timestamp:
+                    published = (datetime.fromisoformat(timestamp) - _EPOCH).total_seconds()
+                    stats.sample((now - published) * 1000)
+            if seq is not None:
+                last_seq = seq
+            if client.slow:
+                await asyncio.sleep(args.slow_delay)
+        else:
+            outcome["disconnects"] += 1
+    except websockets.ConnectionClosed:
+        outcome["disconnects"] += 1
+    finally:
+        await ws.close()
+
+
+def raise_fd_limit():
+    """Allow as many sockets as the hard limit permits"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def run_process(clients, args, window):
+    raise_fd_limit()
+    rng = random.Random(args.seed)
+    groups = {"normal": GroupStats(rng), "slow": GroupStats(rng)}
+    outcome = {"connect_ms": array("d"), "failures": {}, "disconnects": 0}
+    await asyncio.gather(*(run_client(c, args, window, groups, outcome) for c in clients))
+    return {
+        "groups": {name: stats.result() for name, stats in groups.items()},
+        "connect_ms": outcome["connect_ms"].tobytes(),
+        "failures": outcome["failures"],
+        "disconnects": outcome["disconnects"],
+    }
+
+
+def process_main(clients, args, window):
+    return asyncio.run(run_process(clients, args, window))
+
+
+def plan_clients(args, t0: float):
+    """Client list per process: symbol, slow flag, connect time and source address"""
+    symbols = args.symbols.split(",")
+    assigned = assign_symbols(symbols, args.clients, args.distribution, args.zipf_s, args.seed)
+    rng = random.Random(args.seed + 1)
+    suffix = f"?{args.query}" if args.query else ""
+    plans = [[] for _ in range(args.processes)]
+    for i, symbol in enumerate(assigned):
+        local_addr = (f"127.0.0.{1 + i % args.source_addresses}", 0) if args.source_addresses > 1 else None
+        plans[i % args.processes].append(Client(
+            f"{args.target}/ws/{symbol}{suffix}",
+            t0 + args.ramp * i / args.clients,
+            rng.random() < args.slow_fraction,
+            local_addr,
+        ))
+    return plans
+
+
+def http_json(base: str, path: str):
+    with urllib.request.urlopen(base + path, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def server_counters(base: str) -> dict:
+    snapshot = http_json(base, "/api/cluster")
+    return {
+        "dropped": snapshot["totals"].get("messages_dropped", 0),
+        "sent": snapshot["totals"].get("messages_sent", 0),
+        "ws_clients": sum(int(w.get("ws_clients", 0)) for w in snapshot["workers"].values()),
+    }
+
+
+def start_server(args, http_base: str):
+    port = urlsplit(args.target).port
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.serve", "--port", str(port), "--rate", str(args.rate),
+         "--book-share", str(args.book_share)],
+        cwd=ROOT,
+        stdout=None if args.server_output else subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            http_json(http_base, "/api")
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("gateway did not start within 30s")
+
+
+def merge(results, args, wall: float) -> dict:
+    connect_ms = array("d")
+    failures = {}
+    metrics = {"clients": args.clients}
+    for result in results:
+        connect_ms.frombytes(result["connect_ms"])
+        for name, count in result["failures"].items():
+            failures[name] = failures.get(name, 0) + count
+    metrics["connected"] = len(connect_ms)
+    metrics["connect_failures"] = failures
+    metrics["disconnects"] = sum(r["disconnects"] for r in results)
+    metrics["connect_ms"] = percentiles(connect_ms)
+
+    delivered_total = 0
+    for group in ("normal", "slow"):
+        latencies = array("d")
+        delivered = gap_drops = 0
+        for result in results:
+            stats = result["groups"][group]
+            latencies.frombytes(stats["latencies"])
+            delivered += stats["delivered"]
+            gap_drops += stats["gap_drops"]
+        delivered_total += delivered
+        metrics[group] = {
+            "latency_ms": percentiles(latencies),
+            "delivered_per_sec": delivered / wall,
+            "gap_drops": gap_drops,
+        }
+    metrics["delivered_per_sec"] = delivered_total / wall
+    return metrics
+
+
+def run(args) -> dict:
+    http_base = args.target.replace("ws://", "http://", 1).replace("wss://", "https://", 1)
+    server = start_server(args, http_base) if args.spawn_server else None
+    try:
+        # Give client processes time to start before the first connect is due
+        t0 = time.time() + 2
+        measure_start = t0 + args.ramp + args.warmup
+        window = (measure_start, measure_start + args.duration)
+        plans = plan_clients(args, t0)
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.processes) as pool:
+            pending = pool.starmap_async(process_main, [(plan, args, window) for plan in plans])
+            time.sleep(max(0.0, measure_start - time.time()))
+            before = server_counters(http_base)
+            time.sleep(max(0.0, window[1] - time.time()))
+            # Let every worker flush its counters to /api/cluster
+            time.sleep(args.stats_wait)
+            after = server_counters(http_base)
+            results = pending.get()
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    metrics = merge(results, args, args.duration)
+    metrics["server_ws_clients"] = before["ws_clients"]
+    metrics["server_messages_dropped"] = after["dropped"] - before["dropped"]
+    metrics["server_messages_sent"] = after["sent"] - before["sent"]
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="gateway base URL, e.g. ws://127.0.0.1:8000 (default: start one)")
+    parser.add_argument("--clients", type=int, default=1000, help="concurrent WebSocket clients")
+    parser.add_argument("--processes", type=int, default=max(1, (multiprocessing.cpu_count() or 2) - 1),
+                        help="client processes (each runs its own event loop)")
+    parser.add_argument("--symbols", default=DEFAULT_SYMBOLS, help="comma-separated symbols, most popular first")
+    parser.add_argument("--distribution", choices=("uniform", "zipf"), default="uniform")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent for --distribution zipf")
+    parser.add_argument("--ramp", type=float, default=10, help="seconds over which clients connect")
+    parser.add_argument("--warmup", type=float, default=2, help="unmeasured seconds after the ramp")
+    parser.add_argument("--duration", type=float, default=10, help="measured seconds")
+    parser.add_argument("--slow-fraction", type=float, default=0.0, help="share of clients that read slowly")
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="seconds a slow client spends per message")
+    parser.add_argument("--client-queue", type=int, default=16,
+                        help="frames a client buffers before TCP backpressure reaches the server")
+    parser.add_argument("--query", default="", help="extra /ws query string, e.g. max_rate=2&delta=true")
+    parser.add_argument("--deflate", action="store_true", help="negotiate permessage-deflate like browsers do")
+    parser.add_argument("--connect-timeout", type=float, default=30)
+    parser.add_argument("--source-addresses", type=int, default=1,
+                        help="spread loopback clients over 127.0.0.1..N to get past ~28k ephemeral ports")
+    parser.add_argument("--rate", type=float, default=1000, help="feed rate when starting the gateway")
+    parser.add_argument("--book-share", type=float, default=0.0,
+                        help="fraction of the started gateway's feed that is book updates")
+    parser.add_argument("--server-output", action="store_true", help="show the started gateway's log")
+    parser.add_argument("--stats-wait", type=float, default=2.5, help="seconds for /api/cluster to catch up")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/loadgen-<time>.json)")
+    args = parser.parse_args()
+    args.spawn_server = args.target is None
+    if args.spawn_server:
+        args.target = "ws://127.0.0.1:8765"
+    args.processes = max(1, min(args.processes, args.clients))
+
+    metrics = run(args)
+    params = {k: v for k, v in vars(args).items() if k not in ("output", "spawn_server", "server_output")}
+    path = write_results("loadgen", params, metrics, args.output)
+    print(json.dumps(metrics, indent=2))
+    print(f"📄 Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Micro-benchmarks for the per-tick hot path.
+
+Times each stage a tick goes through, both on its own and end to end, at
+several symbol counts:
+
+- generator: ``generate_quote`` / ``generate_trade`` / ``update_price`` /
+  ``generate_book``, and
+  a NumPy candidate that generates every symbol's quote in one batch
+- timestamps: ``datetime.utcnow().isoformat()`` and ``datetime.fromisoformat``
+- encoding: ``json`` against binary candidates (``struct`` always; ``orjson``
+  and ``msgpack`` when installed), quotes only so the layouts are comparable
+- gateway: ``FanoutHub.dispatch`` with no subscribers (parse, sequence, ring)
+
+    python -m benchmarks.micro --symbols 5,100,1000,10000
+
+Reported per stage: ``ns_per_tick`` (median and best of ``--repeat``),
+``alloc_blocks_per_tick`` (net allocated blocks with each stage's outputs kept
+alive, i.e. what a tick leaves behind) and ``peak_bytes_per_tick`` (traced
+peak, which also counts temporaries freed during the call).
+"""
+from contextlib import redirect_stdout
+from datetime import datetime
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import struct
+import sys
+import time
+import tracemalloc
+
+from ._harness import load_gateway, load_generator, write_results
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_EPOCH = datetime(1970, 1, 1)
+# symbol, bid, ask, bid size, ask size, timestamp (epoch seconds)
+QUOTE_STRUCT = struct.Struct("<8sddIId")
+
+
+def make_generator(count: int, seed: int):
+    """The real generator over a synthetic universe of ``count`` instruments"""
+    module = load_generator()
+    from universe import SymbolRegistry, synthetic_instruments
+    return module.MarketDataGenerator(SymbolRegistry(synthetic_instruments(count, seed)))
+
+
+def pack_quote(message: dict) -> bytes:
+    timestamp = (datetime.fromisoformat(message["timestamp"]) - _EPOCH).total_seconds()
+    return QUOTE_STRUCT.pack(
+        message["symbol"].encode(), message["bid_price"], message["ask_price"],
+        message["bid_size"], message["ask_size"], timestamp
+    )
+
+
+def unpack_quote(data: bytes) -> tuple:
+    return QUOTE_STRUCT.unpack(data)
+
+
+class VectorGenerator:
+    """Every symbol's quote in one NumPy pass, mirroring ``generate_quote``"""
+
+    def __init__(self, generator, seed: int):
+        self.symbols = generator.symbols
+        self.prices = np.array([generator.base_prices[s] for s in self.symbols])
+        self.volatility = np.array([generator.volatility[s] for s in self.symbols])
+        self.rng = np.random.default_rng(seed)
+
+    def quotes(self):
+        n = len(self.symbols)
+        half_spread = self.prices * self.rng.uniform(0.0001, 0.0005, n) / 2
+        bid = np.round(self.prices - half_spread, 2)
+        ask = np.round(self.prices + half_spread, 2)
+        bid_size = self.rng.integers(1, 51, n) * 100
+        ask_size = self.rng.integers(1, 51, n) * 100
+        self.prices *= 1 + self.rng.normal(0, self.volatility)
+        return bid, ask, bid_size, ask_size
+
+    def messages(self):
+        bid, ask, bid_size, ask_size = self.quotes()
+        timestamp = datetime.utcnow().isoformat()
+        return [
+            {"type": "quote", "symbol": s, "bid_price": b, "ask_price": a,
+             "bid_size": bs, "ask_size": az, "timestamp": timestamp}
+            for s, b, a, bs, az in zip(self.symbols, bid.tolist(), ask.tolist(),
+                                       bid_size.tolist(), ask_size.tolist())
+        ]
+
+
+def measure(fn, ticks: int, repeat: int) -> dict:
+    """Time ``fn`` (which performs ``ticks`` ticks) and account its allocations"""
+    fn()  # warm caches and lazily created state
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter_ns()
+            fn()
+            timings.append((time.perf_counter_ns() - started) / ticks)
+
+        blocks_before = sys.getallocatedblocks()
+        kept = fn()
+        blocks = sys.getallocatedblocks() - blocks_before
+        del kept
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        kept = fn()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        tracemalloc.stop()
+        del kept
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "ns_per_tick": statistics.median(timings),
+        "ns_per_tick_min": min(timings),
+        "alloc_blocks_per_tick": blocks / ticks,
+        "peak_bytes_per_tick": peak / ticks,
+    }
+
+
+def stages(count: int, seed: int):
+    """(name, callable, ticks per call) for one symbol count"""
+    random.seed(seed)
+    generator = make_generator(count, seed)
+    symbols = generator.symbols
+    quotes = [generator.generate_quote(s) for s in symbols]
+    trades = [generator.generate_trade(s) for s in symbols]
+    quote_json = [json.dumps(m) for m in quotes]
+    quote_struct = [pack_quote(m) for m in quotes]
+
+    gateway = load_gateway()
+    hub = gateway.FanoutHub(None, 1000, 1000)
+    feed = []
+    for symbol, quote, trade in zip(symbols, quotes, trades):
+        channel = f"market:{symbol}".encode()
+        feed.append((channel, json.dumps(quote).encode()))
+        feed.append((channel, json.dumps(trade).encode()))
+
+    yield "gen.quote", lambda: [generator.generate_quote(s) for s in symbols], count
+    yield "gen.trade", lambda: [generator.generate_trade(s) for s in symbols], count
+    yield "gen.update_price", lambda: [generator.update_price(s) for s in symbols], count
+    if generator.books:
+        yield "gen.book", lambda: [generator.generate_book(s) for s in symbols], count
+    yield "ts.utcnow_isoformat", lambda: [datetime.utcnow().isoformat() for _ in symbols], count
+    yield "ts.fromisoformat", lambda: [datetime.fromisoformat(m["timestamp"]) for m in quotes], count
+
+    yield "encode.json", lambda: [json.dumps(m) for m in quotes], count
+    yield "decode.json", lambda: [json.loads(t) for t in quote_json], count
+    yield "encode.struct", lambda: [pack_quote(m) for m in quotes], count
+    yield "decode.struct", lambda: [unpack_quote(b) for b in quote_struct], count
+    if orjson is not None:
+        quote_orjson = [orjson.dumps(m) for m in quotes]
+        yield "encode.orjson", lambda: [orjson.dumps(m) for m in quotes], count
+        yield "decode.orjson", lambda: [orjson.loads(b) for b in quote_orjson], count
+    if msgpack is not None:
+        quote_msgpack = [msgpack.packb(m) for m in quotes]
+        yield "encode.msgpack", lambda: [msgpack.packb(m) for m in quotes], count
+        yield "decode.msgpack", lambda: [msgpack.unpackb(b) for b in quote_msgpack], count
+
+    yield "gateway.dispatch", lambda: [hub.dispatch(c, d) for c, d in feed], len(feed)
+
+    def e2e_json():
+        out = []
+        for symbol in symbols:
+            message = json.loads(json.dumps(generator.generate_quote(symbol)))
+            out.append(datetime.fromisoformat(message["timestamp"]))
+        return out
+
+    def e2e_struct():
+        return [unpack_quote(pack_quote(generator.generate_quote(s))) for s in symbols]
+
+    yield "e2e.quote_json", e2e_json, count
+    yield "e2e.quote_struct", e2e_struct, count
+
+    if np is not None:
+        vector = VectorGenerator(generator, seed)
+        yield "vector.quote_arrays", vector.quotes, count
+        yield "vector.quote_messages", vector.messages, count
+
+
+def run(args) -> dict:
+    results = {}
+    for count in args.symbols:
+        results[str(count)] = {}
+        for name, fn, ticks in stages(count, args.seed):
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            # Enough calls per timing that tiny symbol counts are not all overhead
+            calls = max(1, args.min_ticks // ticks)
+            batch = (lambda fn=fn, calls=calls: [fn() for _ in range(calls)]) if calls > 1 else fn
+            results[str(count)][name] = measure(batch, ticks * calls, args.repeat)
+    return results
+
+
+def print_table(results: dict):
+    print(f"{'symbols':>8}  {'stage':<24}{'ns/tick':>12}{'best':>12}{'blocks/tick':>13}{'peak B/tick':>13}")
+    for count, by_stage in results.items():
+        for name, m in by_stage.items():
+            print(
+                f"{count:>8}  {name:<24}{m['ns_per_tick']:>12.0f}{m['ns_per_tick_min']:>12.0f}"
+                f"{m['alloc_blocks_per_tick']:>13.2f}{m['peak_bytes_per_tick']:>13.0f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", default="5,100,1000,10000",
+                        type=lambda s: [int(n) for n in s.split(",")], help="comma-separated symbol counts")
+    parser.add_argument("--repeat", type=int, default=7, help="timed repetitions per stage")
+    parser.add_argument("--min-ticks", type=int, default=20000, help="ticks per timed repetition")
+    parser.add_argument("--only", type=lambda s: s.split(","), help="stage name prefixes, e.g. encode,decode")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/micro-<time>.json)")
+    args = parser.parse_args()
+
+    # The generator prints news events from update_price; keep them out of the table
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        results = run(args)
+    print_table(results)
+    params = {k: v for k, v in vars(args).items() if k != "output"}
+    path = write_results("micro", params, results, args.output)
+    print(f"📄 Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
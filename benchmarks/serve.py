@@ -0,0 +1,64 @@
+"""
+Stand-alone gateway for load tests.
+
+Runs the gateway with the same local stand-ins as the e2e benchmark (an
+in-process fake Redis unless ``--redis-url`` is given, and the stand-in
+database) and drives ``MarketDataGenerator`` into it at a fixed rate until
+interrupted. Load clients then connect from other processes:
+
+    python -m benchmarks.serve --port 8765 --rate 1000
+"""
+import argparse
+import asyncio
+import random
+import signal
+
+from ._harness import StandInDatabase, gateway_server, load_gateway, load_generator, make_redis
+from .e2e import drive
+
+
+async def serve(args):
+    random.seed(args.seed)
+    gateway = load_gateway()
+    generator = load_generator().MarketDataGenerator()
+
+    redis_client = await make_redis(args.redis_url)
+    generator.redis_client = redis_client
+    gateway.redis_client = redis_client
+    database = StandInDatabase(args.db_latency)
+    gateway.db = database
+    gateway.writer = gateway.IngestionWriter(database)
+    gateway.start_pipeline()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with gateway_server(gateway, host=args.host, port=args.port, backlog=args.backlog) as base:
+        print(f"🚀 Gateway serving {base} at {args.rate:g} msg/s", flush=True)
+        await drive(generator, args.rate, stop, [0], args.book_share)
+
+    for component in (
+        gateway.hub, gateway.lease, gateway.writer, gateway.feed_monitor, gateway.correlation_engine,
+        gateway.summary_engine, gateway.cluster_stats,
+    ):
+        await component.stop()
+    await database.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=1000, help="published messages per second")
+    parser.add_argument("--book-share", type=float, default=0.0, help="fraction of messages that are book updates")
+    parser.add_argument("--backlog", type=int, default=8192, help="listen backlog for connect bursts")
+    parser.add_argument("--redis-url", help="use a real Redis instead of the in-process fake")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="stand-in seconds per insert batch")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Price and spread alerts.
+
+Clients register one-shot thresholds over ``/ws/alerts``. Each (symbol, kind)
+keeps two ``SortedKeys`` lists, ordered so the next alerts to fire sit at the
+tail:
+
+- ``above`` holds ``(-threshold, alert_id)`` for thresholds still above the
+  last value; a rise to ``value`` fires the tail with ``threshold <= value``
+- ``below`` holds ``(threshold, alert_id)`` for thresholds still below the
+  last value; a fall to ``value`` fires the tail with ``threshold >= value``
+
+Evaluating a tick is therefore one bisect plus the alerts that actually fire
+(cutting off the tail moves nothing), however many are registered. An alert
+whose condition already holds when it is registered fires immediately.
+"""
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, List, Optional, Tuple
+import math
+
+from . import metrics
+
+KINDS = ("price", "spread")
+OPS = ("above", "below")
+
+
+class AlertError(ValueError):
+    pass
+
+
+class Alert:
+    __slots__ = ("id", "symbol", "kind", "op", "threshold", "owner")
+
+    def __init__(self, alert_id: int, symbol: str, kind: str, op: str, threshold: float, owner):
+        self.id = alert_id
+        self.symbol = symbol
+        self.kind = kind
+        self.op = op
+        self.threshold = threshold
+        self.owner = owner
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "symbol": self.symbol,
+            "kind": self.kind,
+            "op": self.op,
+            "threshold": self.threshold,
+        }
+
+
+class SortedKeys:
+    """Sorted list split into buckets of at most ``2 * LOAD`` keys
+
+    Inserting into one flat list moves half of it on average, which adds up
+    with hundreds of thousands of alerts on one symbol; here an insert moves
+    at most a bucket plus the small index of bucket heads.
+    """
+    __slots__ = ("buckets", "heads", "size")
+    LOAD = 512
+
+    def __init__(self):
+        self.buckets: List[list] = []
+        # First key of each bucket
+        self.heads: List[tuple] = []
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _bucket(self, key: tuple) -> int:
+        return max(bisect_right(self.heads, key) - 1, 0)
+
+    def last(self) -> tuple:
+        return self.buckets[-1][-1]
+
+    def add(self, key: tuple):
+        self.size += 1
+        if not self.buckets:
+            self.buckets.append([key])
+            self.heads.append(key)
+            return
+        i = self._bucket(key)
+        bucket = self.buckets[i]
+        insort(bucket, key)
+        self.heads[i] = bucket[0]
+        if len(bucket) > 2 * self.LOAD:
+            self.buckets[i:i + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+            self.heads.insert(i + 1, bucket[self.LOAD])
+
+    def remove(self, key: tuple) -> bool:
+        if not self.buckets:
+            return False
+        i = self._bucket(key)
+        bucket = self.buckets[i]
+        j = bisect_left(bucket, key)
+        if j == len(bucket) or bucket[j] != key:
+            return False
+        del bucket[j]
+        self.size -= 1
+        if bucket:
+            self.heads[i] = bucket[0]
+        else:
+            del self.buckets[i], self.heads[i]
+        return True
+
+    def pop_from(self, key: tuple) -> list:
+        """Remove and return every key ``>= key``, in order"""
+        if not self.buckets:
+            return []
+        i = self._bucket(key)
+        bucket = self.buckets[i]
+        j = bisect_left(bucket, key)
+        popped = bucket[j:]
+        del bucket[j:]
+        for tail in self.buckets[i + 1:]:
+            popped.extend(tail)
+        del self.buckets[i + 1:], self.heads[i + 1:]
+        if not bucket:
+            del self.buckets[i], self.heads[i]
+        self.size -= len(popped)
+        return popped
+
+
+class ThresholdIndex:
+    """Pending alerts for one symbol and kind"""
+    __slots__ = ("above", "below", "last")
+
+    def __init__(self):
+        self.above = SortedKeys()
+        self.below = SortedKeys()
+        self.last: Optional[float] = None
+
+    def add(self, alert: Alert):
+        entries, key = self._entry(alert)
+        entries.add(key)
+
+    def remove(self, alert: Alert):
+        entries, key = self._entry(alert)
+        entries.remove(key)
+
+    def _entry(self, alert: Alert) -> Tuple[SortedKeys, Tuple[float, int]]:
+        if alert.op == "above":
+            return self.above, (-alert.threshold, alert.id)
+        return self.below, (alert.threshold, alert.id)
+
+    def advance(self, value: float) -> List[int]:
+        """Move to ``value`` and return the ids of alerts it crossed"""
+        self.last = value
+        fired = []
+        above, below = self.above, self.below
+        if above and -above.last()[0] <= value:
+            fired.extend(alert_id for _, alert_id in above.pop_from((-value, -1)))
+        if below and below.last()[0] >= value:
+            fired.extend(alert_id for _, alert_id in below.pop_from((value, -1)))
+        return fired
+
+    def __len__(self) -> int:
+        return len(self.above) + len(self.below)
+
+
+class AlertEngine:
+    """Hub listener evaluating registered thresholds on every trade and quote"""
+
+    def __init__(self, max_per_owner: int = 1000):
+        self.max_per_owner = max_per_owner
+        self.alerts: Dict[int, Alert] = {}
+        # (symbol, kind) -> index
+        self.indexes: Dict[Tuple[str, str], ThresholdIndex] = {}
+        self.owned: Dict[object, Dict[int, Alert]] = {}
+        self.fired = 0
+        self._next_id = 1
+        # Called with (alert, fired message) for each fired alert
+        self.deliver: Optional[Callable[[Alert, dict], None]] = None
+
+    def add(self, owner, symbol: str, kind: str, op: str, threshold: float) -> Tuple[Alert, Optional[dict]]:
+        """Register an alert; returns it and the fired message if it already holds"""
+        if kind not in KINDS:
+            raise AlertError(f"kind must be one of {', '.join(KINDS)}")
+        if op not in OPS:
+            raise AlertError(f"op must be one of {', '.join(OPS)}")
+        if not math.isfinite(threshold) or threshold < 0:
+            raise AlertError("threshold must be a finite, non-negative number")
+        owned = self.owned.setdefault(owner, {})
+        if len(owned) >= self.max_per_owner:
+            raise AlertError(f"at most {self.max_per_owner} alerts per connection")
+
+        alert = Alert(self._next_id, symbol, kind, op, threshold, owner)
+        self._next_id += 1
+        index = self.indexes.get((symbol, kind))
+        if index is None:
+            index = self.indexes[(symbol, kind)] = ThresholdIndex()
+
+        last = index.last
+        if last is not None and (last >= threshold if op == "above" else last <= threshold):
+            self.fired += 1
+            metrics.ALERTS_FIRED.inc()
+            return alert, self._fired_message(alert, last, None)
+
+        index.add(alert)
+        self.alerts[alert.id] = alert
+        owned[alert.id] = alert
+        metrics.ALERTS_REGISTERED.inc()
+        return alert, None
+
+    def cancel(self, owner, alert_id: int) -> bool:
+        alert = self.owned.get(owner, {}).pop(alert_id, None)
+        if alert is None:
+            return False
+        self.alerts.pop(alert_id, None)
+        self.indexes[(alert.symbol, alert.kind)].remove(alert)
+        metrics.ALERTS_REGISTERED.dec()
+        return True
+
+    def drop_owner(self, owner):
+        """Forget every alert of a disconnected client"""
+        for alert_id in list(self.owned.get(owner, ())):
+            self.cancel(owner, alert_id)
+        self.owned.pop(owner, None)
+
+    def list(self, owner) -> List[dict]:
+        return [alert.to_dict() for alert in self.owned.get(owner, {}).values()]
+
+    def observe(self, message: dict):
+        kind = message["type"]
+        if kind == "trade":
+            self._evaluate(message["symbol"], "price", message["price"], message["timestamp"])
+        elif kind == "quote":
+            spread = round(message["ask_price"] - message["bid_price"], 10)
+            self._evaluate(message["symbol"], "spread", spread, message["timestamp"])
+
+    def _evaluate(self, symbol: str, kind: str, value: float, timestamp: str):
+        index = self.indexes.get((symbol, kind))
+        if index is None:
+            index = self.indexes[(symbol, kind)] = ThresholdIndex()
+        previous = index.last
+        for alert_id in index.advance(value):
+            alert = self.alerts.pop(alert_id)
+            self.owned[alert.owner].pop(alert_id, None)
+            self.fired += 1
+            metrics.ALERTS_REGISTERED.dec()
+            metrics.ALERTS_FIRED.inc()
+            if self.deliver is not None:
+                message = self._fired_message(alert, value, previous)
+                message["timestamp"] = timestamp
+                self.deliver(alert, message)
+
+    @staticmethod
+    def _fired_message(alert: Alert, value: float, previous: Optional[float]) -> dict:
+        return {"type": "alert", **alert.to_dict(), "value": value, "previous": previous}
+
+    def stats(self) -> dict:
+        return {
+            "registered": len(self.alerts),
+            "fired": self.fired,
+            "indexes": sum(1 for index in self.indexes.values() if len(index)),
+        }
@@ -0,0 +1,403 @@
+"""
+Cold storage tier: closed days of ticks as Parquet, queried with DuckDB.
+
+Postgres keeps only the hot window, the last ``hot_days`` UTC days. On the
+ingestion leader, ``ArchiveJob`` takes the oldest day before that window
+every ``interval`` seconds. For each table it:
+
+1. streams the day out of Postgres with ``COPY ... TO STDOUT`` into a CSV
+   staging file, so no row passes through Python;
+2. has DuckDB rewrite the file as Parquet partitioned by symbol and date
+   (``trades/symbol=AAPL/date=2024-01-02/day0.parquet``). Exporting a day
+   again replaces its files with the union of the archived and the new rows,
+   so a retried day is never duplicated and late rows are not lost.
+
+Then it advances the watermark, which is the first day still in Postgres,
+kept in ``watermark`` next to the files. Only after that is the day deleted
+from Postgres, in the same snapshot as the export. Readers (history, series, quotes, trades and
+replay) split every range at the watermark: older days come from Parquet and
+the rest from Postgres, so no row is read twice.
+
+Queries run on an embedded DuckDB (one cursor per query, on a worker
+thread) over ``read_parquet`` with hive partitioning, so filtering on a
+symbol and date range only opens the files of those partitions.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import glob
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+try:
+    import duckdb
+except ImportError:  # duckdb is optional; without it nothing is archived
+    duckdb = None
+
+from . import metrics
+
+# Column types of each table's Parquet files, in COPY order
+COLUMNS = {
+    "trades": {
+        "id": "BIGINT", "time": "TIMESTAMP", "symbol": "VARCHAR",
+        "price": "DOUBLE", "volume": "BIGINT", "side": "VARCHAR",
+    },
+    "quotes": {
+        "id": "BIGINT", "time": "TIMESTAMP", "symbol": "VARCHAR",
+        "bid_price": "DOUBLE", "ask_price": "DOUBLE", "bid_size": "BIGINT", "ask_size": "BIGINT",
+    },
+}
+
+# Bar sizes for /api/history; all divide a day, so no bar straddles the watermark
+INTERVALS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "1d": 86400}
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Naive UTC, the way the Parquet files store time"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+
+class ParquetArchive:
+    def __init__(self, directory: str, threads: int = 2):
+        self.directory = directory
+        self.threads = threads
+        self._conn = None
+        # Queries and exports reach conn from several worker threads at once
+        self._conn_lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return duckdb is not None
+
+    @property
+    def conn(self):
+        with self._conn_lock:
+            if self._conn is None:
+                self._conn = duckdb.connect(config={"threads": self.threads})
+            return self._conn
+
+    def close(self):
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def files(self, table: str) -> str:
+        return os.path.join(self.directory, table, "*", "*", "*.parquet")
+
+    @property
+    def watermark(self) -> Optional[date]:
+        """First day not archived yet, or None before the first export"""
+        try:
+            with open(os.path.join(self.directory, "watermark")) as f:
+                return date.fromisoformat(f.read().strip())
+        except FileNotFoundError:
+            return None
+
+    def set_watermark(self, day: date):
+        path = os.path.join(self.directory, "watermark")
+        with open(path + ".tmp", "w") as f:
+            f.write(day.isoformat())
+        os.replace(path + ".tmp", path)
+
+    def split(self, start: datetime, end: datetime) -> Tuple[Optional[Tuple[datetime, datetime]], Optional[datetime]]:
+        """The archived part of naive UTC [start, end) and where the Postgres part starts
+
+        The Postgres part is [hot_start, end), or empty when hot_start is None.
+        """
+        watermark = self.watermark if self.available else None
+        if watermark is None:
+            return None, start
+        boundary = _midnight(watermark)
+        archived = (start, min(end, boundary)) if start < boundary else None
+        hot_start = max(start, boundary) if end > boundary else None
+        return archived, hot_start
+
+    def export(self, table: str, csv_path: str, day: date):
+        """Rewrite a staged CSV day of ``table`` into the partitioned Parquet files
+
+        The day is written to a staging directory first and each symbol's
+        partition is then swapped into place, so a re-export replaces every
+        file of the day instead of leaving older ones next to the new files.
+        """
+        columns = ", ".join(f"'{name}': '{kind}'" for name, kind in COLUMNS[table].items())
+        staging = os.path.join(self.directory, f".staging-{table}-{day}")
+        shutil.rmtree(staging, ignore_errors=True)
+        partition = f"date={day}"
+        rows = f"SELECT * FROM read_csv($1, header = false, delim = ',', quote = '\"', columns = {{{columns}}})"
+        params = [csv_path]
+        # Rows that reach Postgres after the day was archived are merged into
+        # its files; on ids present in both, the Postgres row wins
+        existing = sorted(glob.glob(os.path.join(self.directory, table, "symbol=*", partition, "*.parquet")))
+        if existing:
+            names = ", ".join(COLUMNS[table])
+            rows = f"""
+                WITH fresh AS ({rows})
+                SELECT * FROM fresh
+                UNION ALL
+                SELECT {names} FROM read_parquet($2, hive_partitioning = true)
+                WHERE id NOT IN (SELECT id FROM fresh)
+            """
+            params.append(existing)
+        self.conn.cursor().execute(
+            f"""
+            COPY (
+                SELECT *, CAST(time AS DATE) AS date
+                FROM ({rows})
+                ORDER BY symbol, time, id
+            ) TO '{staging.replace("'", "''")}' (
+                FORMAT PARQUET, PARTITION_BY (symbol, date), FILENAME_PATTERN 'day'
+            )
+            """,
+            params,
+        )
+        trash = os.path.join(staging, ".old")
+        os.makedirs(trash)
+        fresh = {
+            os.path.basename(os.path.dirname(path))
+            for path in glob.glob(os.path.join(staging, "symbol=*", partition))
+        }
+        # Symbols that no longer have rows that day lose their old partition
+        for path in glob.glob(os.path.join(self.directory, table, "symbol=*", partition)):
+            if os.path.basename(os.path.dirname(path)) not in fresh:
+                os.rename(path, os.path.join(trash, os.path.basename(os.path.dirname(path))))
+        for symbol in fresh:
+            target = os.path.join(self.directory, table, symbol, partition)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.exists(target):
+                os.rename(target, os.path.join(trash, symbol))
+            os.rename(os.path.join(staging, symbol, partition), target)
+        shutil.rmtree(staging)
+
+    def _read(self, table: str, sql: str, params: list):
+        """Run a query over an archived table; None when nothing is archived yet"""
+        try:
+            return self.conn.cursor().execute(
+                sql.format(**{table: f"read_parquet('{self.files(table)}', hive_partitioning = true)"}),
+                params,
+            )
+        except duckdb.IOException as e:
+            if "No files found" in str(e):
+                return None
+            raise
+
+    def _records(self, result) -> List[dict]:
+        """Rows as dicts shaped like the Postgres records, with UTC-aware times"""
+        if result is None:
+            return []
+        names = [column[0] for column in result.description]
+        rows = []
+        for values in result.fetchall():
+            row = dict(zip(names, values))
+            row["time"] = row["time"].replace(tzinfo=timezone.utc)
+            rows.append(row)
+        return rows
+
+    def recent(self, table: str, symbol: str, start: datetime, end: datetime, limit: int) -> List[dict]:
+        """The newest ``limit`` archived rows of ``table`` in [start, end), newest first"""
+        return self._records(self._read(
+            table,
+            f"""
+            SELECT {", ".join(COLUMNS[table])}
+            FROM {{{table}}}
+            WHERE symbol = $1 AND date >= $2 AND date <= $3 AND time >= $4 AND time < $5
+            ORDER BY time DESC, id DESC
+            LIMIT $6
+            """,
+            [symbol, start.date(), end.date(), start, end, limit],
+        ))
+
+    def replay_rows(
+        self, table: str, symbols: List[str], after_time: datetime, after_id: int, end: datetime, limit: int
+    ) -> List[dict]:
+        """Archived rows after (after_time, after_id) and before ``end``, oldest first"""
+        after_time = naive_utc(after_time)
+        return self._records(self._read(
+            table,
+            f"""
+            SELECT {", ".join(COLUMNS[table])}
+            FROM {{{table}}}
+            WHERE list_contains($1, symbol) AND date >= $2 AND date <= $3
+            AND (time > $4 OR (time = $4 AND id > $5)) AND time < $6
+            ORDER BY time, id
+            LIMIT $7
+            """,
+            [symbols, after_time.date(), end.date(), after_time, after_id, end, limit],
+        ))
+
+    def trade_bars(self, symbol: str, start: datetime, end: datetime, seconds: int) -> List[tuple]:
+        """OHLCV bars of archived trades in [start, end), keyed by epoch seconds"""
+        result = self._read(
+            "trades",
+            """
+            SELECT
+                floor(epoch(time) / $1) * $1 AS bucket,
+                arg_min(price, (time, id)) AS open,
+                max(price) AS high,
+                min(price) AS low,
+                arg_max(price, (time, id)) AS close,
+                sum(volume) AS volume,
+                sum(price * volume) / nullif(sum(volume), 0) AS vwap,
+                count(*) AS trades
+            FROM {trades}
+            WHERE symbol = $2 AND date >= $3 AND date <= $4 AND time >= $5 AND time < $6
+            GROUP BY bucket
+            ORDER BY bucket
+            """,
+            [float(seconds), symbol, start.date(), end.date(), start, end],
+        )
+        return result.fetchall() if result else []
+
+    def trade_prices(self, symbol: str, start: datetime, end: datetime, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Epoch seconds and prices of the first ``limit`` archived trades in [start, end)"""
+        result = self._read(
+            "trades",
+            """
+            SELECT epoch(time) AS t, price
+            FROM {trades}
+            WHERE symbol = $1 AND date >= $2 AND date <= $3 AND time >= $4 AND time < $5
+            ORDER BY time, id
+            LIMIT $6
+            """,
+            [symbol, start.date(), end.date(), start, end, limit],
+        )
+        if result is None:
+            return np.empty(0), np.empty(0)
+        columns = result.fetchnumpy()
+        return columns["t"].astype(np.float64), columns["price"].astype(np.float64)
+
+
+def bars_payload(symbol: str, interval: str, rows: list) -> dict:
+    """Bars (tuples or records in ``trade_bars`` column order) plus a range summary"""
+    bars = [
+        {
+            "time": datetime.utcfromtimestamp(row[0]).isoformat(),
+            "open": row[1],
+            "high": row[2],
+            "low": row[3],
+            "close": row[4],
+            "volume": row[5],
+            "vwap": row[6],
+            "trades": row[7],
+        }
+        for row in rows
+    ]
+    summary = None
+    if bars:
+        volume = sum(bar["volume"] for bar in bars)
+        summary = {
+            "open": bars[0]["open"],
+            "high": max(bar["high"] for bar in bars),
+            "low": min(bar["low"] for bar in bars),
+            "close": bars[-1]["close"],
+            "volume": volume,
+            "vwap": sum(bar["vwap"] * bar["volume"] for bar in bars if bar["vwap"] is not None) / volume if volume else None,
+            "trades": sum(bar["trades"] for bar in bars),
+        }
+    return {"symbol": symbol, "interval": interval, "bars": bars, "summary": summary}
+
+
+class ArchiveJob:
+    """Moves closed days older than the hot window from Postgres to the archive"""
+
+    def __init__(
+        self,
+        db,
+        archive: ParquetArchive,
+        hot_days: int,
+        interval: float,
+        statement_timeout_ms: int,
+        is_leader: Callable[[], bool],
+    ):
+        self.db = db
+        self.archive = archive
+        self.hot_days = hot_days
+        self.interval = interval
+        self.statement_timeout_ms = statement_timeout_ms
+        self.is_leader = is_leader
+        self.days_archived = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self.is_leader():
+                continue
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The day stays in Postgres and is retried on the next pass
+                print(f"❌ Archive error: {e}")
+
+    async def run_once(self):
+        cutoff = datetime.utcnow().date() - timedelta(days=self.hot_days)
+        os.makedirs(self.archive.directory, exist_ok=True)
+        while self.is_leader():
+            async with self.db.write(self.statement_timeout_ms) as conn:
+                oldest = await conn.fetchval(
+                    "SELECT LEAST((SELECT min(time) FROM trades), (SELECT min(time) FROM quotes))"
+                )
+                if oldest is None:
+                    return
+                day = oldest.astimezone(timezone.utc).date()
+                if day >= cutoff:
+                    return
+                await self._archive_day(conn, day)
+
+    async def _archive_day(self, conn, day: date):
+        start, end = _midnight(day), _midnight(day + timedelta(days=1))
+        watermark = self.archive.watermark
+        counts = {}
+        # One snapshot for export and delete: the delete removes exactly the
+        # exported rows, and rows committed meanwhile wait for the next pass.
+        # A day before the watermark only has late rows left; they are merged
+        # into its files.
+        async with conn.transaction(isolation="repeatable_read"):
+            for table, columns in COLUMNS.items():
+                counts[table] = await self._export(conn, table, columns, start, end)
+            if watermark is None or day >= watermark:
+                self.archive.set_watermark(day + timedelta(days=1))
+            for table in COLUMNS:
+                await conn.execute(f"DELETE FROM {table} WHERE time >= $1 AND time < $2", start, end)
+        self.days_archived += 1
+        print(f"🗄️ Archived {day}: {counts['trades']} trades, {counts['quotes']} quotes")
+
+    async def _export(self, conn, table: str, columns: dict, start: datetime, end: datetime) -> int:
+        select = ", ".join("time AT TIME ZONE 'UTC'" if name == "time" else name for name in columns)
+        fd, path = tempfile.mkstemp(suffix=".csv", dir=self.archive.directory)
+        os.close(fd)
+        try:
+            status = await conn.copy_from_query(
+                f"SELECT {select} FROM {table} WHERE time >= $1 AND time < $2",
+                start, end, output=path, format="csv",
+            )
+            rows = int(status.split()[-1])
+            if rows:
+                await asyncio.to_thread(self.archive.export, table, path, start.date())
+                metrics.ARCHIVED_ROWS.labels(table).inc(rows)
+            return rows
+        finally:
+            os.unlink(path)
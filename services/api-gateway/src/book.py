@@ -0,0 +1,126 @@
+"""
+Level-2 order books rebuilt from the generator's ``book:{symbol}`` feed.
+
+Each side is a sorted list of price keys (negated for bids, so index 0 is
+always the best level) plus a price -> size dict: modifying a level is O(1),
+adding or deleting one is a bisect (O(log n)) and a short list shift, and the
+top ``depth`` levels are a slice.
+
+The feed carries ``book_seq`` per symbol. Books start invalid, become valid
+on a full ``snapshot`` message, and go invalid again if a ``book_seq`` is
+skipped, until the generator's next periodic snapshot.
+"""
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional
+
+CHANNEL_PREFIX = "book:"
+
+
+class BookSide:
+    """Price levels of one side, best first"""
+    __slots__ = ("sign", "keys", "sizes")
+
+    def __init__(self, descending: bool):
+        self.sign = -1.0 if descending else 1.0
+        # sign * price, ascending
+        self.keys: List[float] = []
+        self.sizes: Dict[float, int] = {}
+
+    def set(self, price: float, size: int):
+        if size <= 0:
+            self.delete(price)
+            return
+        if price not in self.sizes:
+            insort(self.keys, self.sign * price)
+        self.sizes[price] = size
+
+    def delete(self, price: float):
+        if self.sizes.pop(price, None) is not None:
+            del self.keys[bisect_left(self.keys, self.sign * price)]
+
+    def clear(self):
+        self.keys.clear()
+        self.sizes.clear()
+
+    def levels(self, depth: int) -> List[list]:
+        sign, sizes = self.sign, self.sizes
+        return [[sign * key, sizes[sign * key]] for key in self.keys[:depth]]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class OrderBook:
+    __slots__ = ("bids", "asks", "book_seq", "valid", "timestamp", "resyncs")
+
+    def __init__(self):
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.book_seq = 0
+        self.valid = False
+        self.timestamp: Optional[str] = None
+        self.resyncs = 0
+
+    def apply(self, message: dict):
+        book_seq = message["book_seq"]
+        if message.get("snapshot"):
+            self.bids.clear()
+            self.asks.clear()
+            for price, size in message["bids"]:
+                self.bids.set(price, size)
+            for price, size in message["asks"]:
+                self.asks.set(price, size)
+            self.valid = True
+        elif not self.valid:
+            pass
+        elif book_seq != self.book_seq + 1:
+            # Missed an update: wait for the next snapshot
+            self.valid = False
+            self.resyncs += 1
+        else:
+            bids, asks = self.bids, self.asks
+            for action, side, price, size in message["updates"]:
+                levels = bids if side == "bid" else asks
+                if action == "delete":
+                    levels.delete(price)
+                else:
+                    levels.set(price, size)
+        self.book_seq = book_seq
+        self.timestamp = message["timestamp"]
+
+    def to_dict(self, symbol: str, depth: int) -> dict:
+        return {
+            "type": "book",
+            "symbol": symbol,
+            "bids": self.bids.levels(depth),
+            "asks": self.asks.levels(depth),
+            "levels": {"bids": len(self.bids), "asks": len(self.asks)},
+            "book_seq": self.book_seq,
+            "timestamp": self.timestamp,
+        }
+
+
+class BookStore:
+    """Hub listener keeping one order book per symbol"""
+
+    def __init__(self):
+        self.books: Dict[str, OrderBook] = {}
+
+    def observe(self, message: dict):
+        if message["type"] != "book":
+            return
+        book = self.books.get(message["symbol"])
+        if book is None:
+            book = self.books[message["symbol"]] = OrderBook()
+        book.apply(message)
+
+    def snapshot(self, symbol: str, depth: int) -> Optional[dict]:
+        """Top ``depth`` levels per side, or None until the book is valid"""
+        book = self.books.get(symbol)
+        if book is None or not book.valid:
+            return None
+        return book.to_dict(symbol, depth)
+
+
+def channel_key(symbol: str) -> str:
+    return f"{CHANNEL_PREFIX}{symbol}"
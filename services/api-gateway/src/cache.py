@@ -0,0 +1,141 @@
+"""
+In-memory hot cache of the latest state and recent ticks per symbol.
+
+Preloaded from the database during warm start, then kept current from the
+live feed. Entries use the same shape as feed messages. Trades are also
+rolled into a one-minute OHLCV bar per symbol.
+"""
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+RECENT_TICKS = 200
+
+
+def _isoformat(value: datetime) -> str:
+    # Feed timestamps are naive UTC; keep preloaded rows consistent with them
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def trade_from_row(row) -> dict:
+    return {
+        "type": "trade",
+        "symbol": row["symbol"],
+        "price": row["price"],
+        "volume": row["volume"],
+        "side": row["side"],
+        "timestamp": _isoformat(row["time"]),
+    }
+
+
+def quote_from_row(row) -> dict:
+    return {
+        "type": "quote",
+        "symbol": row["symbol"],
+        "bid_price": row["bid_price"],
+        "ask_price": row["ask_price"],
+        "bid_size": row["bid_size"],
+        "ask_size": row["ask_size"],
+        "timestamp": _isoformat(row["time"]),
+    }
+
+
+class SymbolState:
+    __slots__ = ("last_trade", "last_quote", "bar", "trades", "quotes")
+
+    def __init__(self, maxlen: int):
+        self.last_trade: Optional[dict] = None
+        self.last_quote: Optional[dict] = None
+        self.bar: Optional[dict] = None
+        self.trades: Deque[dict] = deque(maxlen=maxlen)
+        self.quotes: Deque[dict] = deque(maxlen=maxlen)
+
+    def update_bar(self, trade: dict):
+        # ISO timestamps sort lexically, so the minute bucket is a prefix
+        start = trade["timestamp"][:16] + ":00"
+        price = trade["price"]
+        bar = self.bar
+        if bar is None or bar["start"] != start:
+            self.bar = {
+                "type": "bar",
+                "symbol": trade["symbol"],
+                "interval": "1m",
+                "start": start,
+                "open": price,
+                "high": price,
+                "low": price,
+                "close": price,
+                "volume": trade["volume"],
+                "trades": 1,
+            }
+            return
+        if price > bar["high"]:
+            bar["high"] = price
+        elif price < bar["low"]:
+            bar["low"] = price
+        bar["close"] = price
+        bar["volume"] += trade["volume"]
+        bar["trades"] += 1
+
+
+class MarketCache:
+    def __init__(self, recent_ticks: int = RECENT_TICKS):
+        self.recent_ticks = recent_ticks
+        self.symbols: Dict[str, SymbolState] = {}
+        self.warm = False
+
+    def state(self, symbol: str) -> SymbolState:
+        state = self.symbols.get(symbol)
+        if state is None:
+            state = self.symbols[symbol] = SymbolState(self.recent_ticks)
+        return state
+
+    def apply(self, message: dict):
+        """Fold one feed message into the cache"""
+        state = self.state(message["symbol"])
+        if message["type"] == "trade":
+            state.last_trade = message
+            state.trades.append(message)
+            state.update_bar(message)
+        elif message["type"] == "quote":
+            state.last_quote = message
+            state.quotes.append(message)
+
+    async def preload(self, conn, symbols: List[str]):
+        """Load the most recent ticks per symbol using the prepared read queries"""
+        recent_trades = conn.prepared["recent_trades"]
+        recent_quotes = conn.prepared["recent_quotes"]
+        for symbol in symbols:
+            state = self.state(symbol)
+            trades = await recent_trades.fetch(symbol, self.recent_ticks)
+            quotes = await recent_quotes.fetch(symbol, self.recent_ticks)
+            # Rows arrive newest first; the deques are oldest first
+            for row in reversed(trades):
+                trade = trade_from_row(row)
+                state.trades.append(trade)
+                state.update_bar(trade)
+            state.quotes.extend(quote_from_row(r) for r in reversed(quotes))
+            state.last_trade = state.trades[-1] if state.trades else None
+            state.last_quote = state.quotes[-1] if state.quotes else None
+        self.warm = True
+
+    def snapshot(self, symbol: str) -> dict:
+        """Latest quote, trade and current bar for a symbol"""
+        state = self.symbols.get(symbol)
+        if state is None:
+            return {"quote": None, "trade": None, "bar": None}
+        return {"quote": state.last_quote, "trade": state.last_trade, "bar": state.bar}
+
+    def latest_prices(self) -> List[dict]:
+        """Same shape as the /api/symbols query: symbol, price, time"""
+        return [
+            {
+                "symbol": symbol,
+                "price": state.last_trade["price"],
+                "time": state.last_trade["timestamp"],
+            }
+            for symbol, state in sorted(self.symbols.items())
+            if state.last_trade is not None
+        ]
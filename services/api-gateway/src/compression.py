@@ -0,0 +1,172 @@
+"""
+Response compression middleware.
+
+Negotiates brotli (when the ``brotli`` package is installed) or gzip from the
+client's Accept-Encoding header and compresses any compressible response
+larger than ``minimum_size``. Responses that already carry a Content-Encoding
+(e.g. the precompressed dashboard assets) are passed through untouched.
+"""
+import gzip
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+def negotiate_encoding(accept_encoding: str):
+    """Pick the best supported encoding from an Accept-Encoding header"""
+    offered = {}
+    for item in accept_encoding.lower().split(","):
+        token, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            offered[token] = quality
+
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    """Compress a complete body in one shot"""
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class _StreamCompressor:
+    """Incremental compressor used for streaming (multi-chunk) responses"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(chunk) + self._brotli.flush()
+        return self._zlib.compress(chunk) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """ASGI middleware applying brotli/gzip above a size threshold"""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message = None
+        self.passthrough = False
+        self.compressor = None
+
+    async def send(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                self.passthrough = True
+                await self.downstream(message)
+            else:
+                # Hold the start message until we know the body size
+                self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None and self.start_message is not None:
+            start, self.start_message = self.start_message, None
+
+            if not more_body:
+                if len(body) < self.middleware.minimum_size:
+                    self.passthrough = True
+                    await self.downstream(start)
+                    await self.downstream(message)
+                    return
+
+                body = compress(body, self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = self.encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                _weaken_etag(headers)
+                await self.downstream(start)
+                await self.downstream({"type": "http.response.body", "body": body})
+                return
+
+            # Streaming response: compress chunk by chunk
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            _weaken_etag(headers)
+            del headers["Content-Length"]
+            self.compressor = _StreamCompressor(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            await self.downstream(start)
+
+        chunk = self.compressor.compress(body) if body else b""
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+def _weaken_etag(headers: MutableHeaders):
+    """A strong ETag no longer matches the bytes once we re-encode them"""
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
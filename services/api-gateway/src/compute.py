@@ -0,0 +1,115 @@
+"""
+Process pool for CPU-heavy analytics endpoints.
+
+Every handler shares one event loop with the WebSocket fan-out. Downsampling
+a long range or building a large correlation matrix inline would delay every
+stream on the worker. ``ComputePool`` runs such jobs in separate processes:
+
+- Inputs of at least ``inline_rows`` elements go to the pool through shared
+  memory (see ``offload.py``). Smaller inputs run inline, where the round
+  trip would cost more than the work.
+- Jobs return the serialized JSON body, so serialization leaves the loop too.
+- At most ``max_jobs`` jobs per gateway worker run or wait for a process.
+  Beyond that a request fails fast with ``ComputeBusy`` (503) instead of
+  queueing.
+- A job still running after ``timeout`` seconds fails with ``ComputeTimeout``
+  (504). A running job cannot be cancelled, so the pool is then restarted.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+import asyncio
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from . import metrics
+from .offload import SharedArrays, run_job
+
+
+class ComputeBusy(Exception):
+    """Every analytics slot on this worker is taken"""
+
+
+class ComputeTimeout(Exception):
+    """An analytics job ran past its timeout and was killed"""
+
+
+class ComputePool:
+    def __init__(self, workers: int = 2, max_jobs: int = 8, timeout: float = 10.0, inline_rows: int = 20000):
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.inline_rows = inline_rows
+        self.active = 0
+        self.restarts = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # forkserver: workers fork from a clean process, not from the event loop's
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["numpy"])
+        return ProcessPoolExecutor(self.workers, mp_context=context)
+
+    def start(self):
+        if self.workers > 0:
+            self._executor = self._new_executor()
+
+    async def prewarm(self):
+        """Start every worker process now rather than on the first heavy request"""
+        if self._executor is None:
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, os.getpid) for _ in range(self.workers)))
+
+    async def stop(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        if executor is not self._executor:
+            return  # another job already replaced it
+        processes = list(executor._processes.values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        self._executor = self._new_executor()
+        self.restarts += 1
+        print(f"♻️ Restarted analytics pool ({self.restarts} restarts)")
+
+    async def run(self, name: str, job: Callable[..., bytes], arrays: Dict[str, np.ndarray], *args, size: int) -> bytes:
+        """``job(arrays, *args)`` inline or in the pool, depending on ``size``"""
+        started = time.perf_counter()
+        if self._executor is None or size < self.inline_rows:
+            body = job(arrays, *args)
+            metrics.COMPUTE_SECONDS.labels(name, "inline").observe(time.perf_counter() - started)
+            return body
+        if self.active >= self.max_jobs:
+            metrics.COMPUTE_REJECTED.labels("busy").inc()
+            raise ComputeBusy(f"All {self.max_jobs} analytics slots are busy")
+
+        self.active += 1
+        executor = self._executor
+        shared = SharedArrays(arrays)
+        try:
+            future = executor.submit(run_job, job, shared.spec, args)
+            body = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            metrics.COMPUTE_REJECTED.labels("timeout").inc()
+            # A job still queued is simply dropped; a running one takes its process down
+            if not future.cancel() and not future.done():
+                self._restart(executor)
+            raise ComputeTimeout(f"{name} job exceeded {self.timeout}s")
+        except BrokenProcessPool:
+            # Killed along with a timed-out job that shared the pool
+            metrics.COMPUTE_REJECTED.labels("restart").inc()
+            self._restart(executor)
+            raise ComputeBusy("Analytics pool restarted")
+        finally:
+            self.active -= 1
+            shared.close()
+        metrics.COMPUTE_SECONDS.labels(name, "pool").observe(time.perf_counter() - started)
+        return body
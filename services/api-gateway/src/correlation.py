@@ -0,0 +1,164 @@
+"""
+Rolling cross-symbol covariance and correlation.
+
+Trades only overwrite each symbol's last price in a NumPy array. Every
+``bar_seconds`` the engine closes a bar: one log return per tracked symbol
+(0 for symbols that have not traded, i.e. the price is carried forward) is
+written into a contiguous ``(max window, symbols)`` ring.
+
+For each configured window it keeps the running sum of returns ``S`` and of
+their outer products ``P``. A bar adds the new return vector and removes the
+one leaving that window, so it costs O(N²) instead of the O(N²·T) of
+recomputing from the ring:
+
+    cov = (P - S Sᵀ / n) / (n - 1)
+
+Requests slice the rows and columns of the symbols asked for and compute the
+matrices from the slices, in the analytics pool for large selections. The sums are
+recomputed exactly from the ring every ``RESUM_INTERVAL`` bars so
+floating-point drift cannot accumulate.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+
+import numpy as np
+
+from .offload import json_body
+
+# Bars between exact recomputations of the running sums
+RESUM_INTERVAL = 1000
+
+
+class WindowSums:
+    __slots__ = ("window", "total", "products")
+
+    def __init__(self, window: int, size: int):
+        self.window = window
+        self.total = np.zeros(size)
+        self.products = np.zeros((size, size))
+
+
+class CorrelationEngine:
+    def __init__(self, symbols: Sequence[str], windows: Sequence[int], bar_seconds: float = 5.0):
+        self.symbols: List[str] = list(symbols)
+        self.index: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.windows = tuple(sorted(set(windows)))
+        self.bar_seconds = bar_seconds
+        size = len(self.symbols)
+        self.prices = np.zeros(size)
+        self.previous = np.zeros(size)
+        self.ring = np.zeros((self.windows[-1], size))
+        self.bars = 0
+        self.sums = {window: WindowSums(window, size) for window in self.windows}
+        self.timestamp: Optional[str] = None
+        self._task = None
+
+    def observe(self, message: dict):
+        """Hub listener: remember the last trade price"""
+        if message["type"] != "trade":
+            return
+        i = self.index.get(message["symbol"])
+        if i is not None:
+            self.prices[i] = message["price"]
+
+    def roll(self):
+        """Close a bar: append the log returns since the previous bar"""
+        prices, previous = self.prices, self.previous
+        if not previous.any():
+            # Nothing to return against yet: this bar only sets the baseline
+            self.previous = prices.copy()
+            return
+        ratio = np.ones_like(prices)
+        np.divide(prices, previous, out=ratio, where=(prices > 0) & (previous > 0))
+        returns = np.log(ratio)
+        self.previous = prices.copy()
+
+        depth = len(self.ring)
+        slot = self.bars % depth
+        self.bars += 1
+        resum = self.bars % RESUM_INTERVAL == 0
+        for sums in self.sums.values():
+            if resum:
+                continue
+            sums.total += returns
+            sums.products += np.outer(returns, returns)
+            if self.bars > sums.window:
+                leaving = self.ring[(slot - sums.window) % depth]
+                sums.total -= leaving
+                sums.products -= np.outer(leaving, leaving)
+        self.ring[slot] = returns
+        if resum:
+            for sums in self.sums.values():
+                window = self.window_rows(sums.window)
+                sums.total = window.sum(axis=0)
+                sums.products = window.T @ window
+        self.timestamp = datetime.utcnow().isoformat()
+
+    def window_rows(self, window: int) -> np.ndarray:
+        """The last ``window`` bars of returns (fewer while filling up)"""
+        depth = len(self.ring)
+        count = min(self.bars, window)
+        rows = [(self.bars - 1 - k) % depth for k in range(count)]
+        return self.ring[rows]
+
+    def window_sums(self, symbols: Sequence[str], window: int) -> Tuple[dict, Dict[str, np.ndarray]]:
+        """Result header and the ``window`` sums restricted to ``symbols`` (all tracked)"""
+        sums = self.sums[window]
+        header = {
+            "symbols": list(symbols),
+            "window": window,
+            "bars": min(self.bars, window),
+            "bar_seconds": self.bar_seconds,
+            "covariance": None,
+            "correlation": None,
+            "timestamp": self.timestamp,
+        }
+        ix = np.array([self.index[symbol] for symbol in symbols], dtype=np.intp)
+        return header, {"products": sums.products[np.ix_(ix, ix)], "total": sums.total[ix]}
+
+    def matrices(self, symbols: Sequence[str], window: int) -> dict:
+        """Covariance and correlation of ``symbols`` (all tracked) over ``window`` bars"""
+        header, arrays = self.window_sums(symbols, window)
+        return matrices_payload(header, arrays["products"], arrays["total"])
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.bar_seconds)
+            self.roll()
+
+
+def matrices_payload(header: dict, products: np.ndarray, total: np.ndarray) -> dict:
+    """``header`` with the covariance and correlation computed from window sums"""
+    result = dict(header)
+    n = header["bars"]
+    if n < 2:
+        return result
+    covariance = (products - np.outer(total, total) / n) / (n - 1)
+    std = np.sqrt(np.clip(np.diag(covariance), 0.0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = np.clip(covariance / np.outer(std, std), -1.0, 1.0)
+    result["covariance"] = _json_matrix(covariance)
+    result["correlation"] = _json_matrix(correlation)
+    return result
+
+
+def correlation_job(arrays: Dict[str, np.ndarray], header: dict) -> bytes:
+    """Analytics pool job: the /api/correlation response body"""
+    return json_body(matrices_payload(header, arrays["products"], arrays["total"]))
+
+
+def _json_matrix(matrix: np.ndarray) -> List[list]:
+    """Nested lists with undefined entries (flat symbols) as None"""
+    return np.where(np.isfinite(matrix), matrix, None).tolist()
@@ -0,0 +1,124 @@
+"""
+Connection manager for the primary and read-replica Postgres pools.
+
+REST handlers read through ``db.read()`` and ingestion writes through
+``db.write()``. The two pools are sized independently, so a burst of heavy
+reads can never take the connections the ingestion path needs.
+
+Every connection prepares the hot queries from ``queries.py`` when it is
+opened, and ``prewarm()`` opens the full pools before the gateway reports
+ready.
+"""
+from contextlib import asynccontextmanager
+from typing import Optional
+import asyncio
+
+import asyncpg
+
+from . import metrics
+from .config import Settings
+from .queries import READ_QUERIES, WRITE_QUERIES
+
+
+class DatabaseUnavailable(Exception):
+    """No pool connection became free within the acquire timeout"""
+
+    def __init__(self, role: str):
+        super().__init__(f"Database {role} pool exhausted")
+        self.role = role
+
+
+class DatabaseTimeout(Exception):
+    """A statement was cancelled by its statement_timeout"""
+
+
+class PreparedConnection(asyncpg.Connection):
+    """Connection carrying its prepared hot-path statements by name"""
+    __slots__ = ("prepared",)
+
+
+def _preparer(queries: dict):
+    async def init(conn):
+        conn.prepared = {name: await conn.prepare(sql) for name, sql in queries.items()}
+    return init
+
+
+class ConnectionManager:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.write_pool: Optional[asyncpg.Pool] = None
+        self.read_pool: Optional[asyncpg.Pool] = None
+        self._gauges = {
+            role: (metrics.DB_POOL_IN_USE.labels(role), metrics.DB_POOL_WAITERS.labels(role))
+            for role in ("read", "write")
+        }
+
+    async def connect(self):
+        s = self.settings
+        self.write_pool = await asyncpg.create_pool(
+            s.database_url,
+            min_size=s.write_pool_min,
+            max_size=s.write_pool_max,
+            connection_class=PreparedConnection,
+            init=_preparer(WRITE_QUERIES),
+            server_settings={
+                "application_name": "api-gateway-write",
+                "statement_timeout": str(s.write_statement_timeout_ms),
+            },
+        )
+        self.read_pool = await asyncpg.create_pool(
+            s.read_url,
+            min_size=s.read_pool_min,
+            max_size=s.read_pool_max,
+            connection_class=PreparedConnection,
+            init=_preparer(READ_QUERIES),
+            server_settings={
+                "application_name": "api-gateway-read",
+                "statement_timeout": str(s.read_statement_timeout_ms),
+            },
+        )
+
+    async def prewarm(self):
+        """Open every pool connection now rather than on first use"""
+        for pool in (self.write_pool, self.read_pool):
+            conns = await asyncio.gather(*(pool.acquire() for _ in range(pool.get_max_size())))
+            for conn in conns:
+                await conn.prepared["ping"].fetchval()
+            for conn in conns:
+                await pool.release(conn)
+
+    async def close(self):
+        for pool in (self.read_pool, self.write_pool):
+            if pool is not None:
+                await pool.close()
+
+    @asynccontextmanager
+    async def _acquire(self, pool: asyncpg.Pool, role: str, statement_timeout_ms: Optional[int]):
+        in_use, waiters = self._gauges[role]
+        waiters.inc()
+        try:
+            conn = await pool.acquire(timeout=self.settings.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise DatabaseUnavailable(role)
+        finally:
+            waiters.dec()
+
+        in_use.inc()
+        try:
+            if statement_timeout_ms is not None:
+                # Session setting; the pool runs RESET ALL when the connection is released
+                await conn.execute(f"SET statement_timeout = {int(statement_timeout_ms)}")
+            yield conn
+        except asyncpg.QueryCanceledError as e:
+            raise DatabaseTimeout(str(e)) from e
+        finally:
+            await pool.release(conn)
+            in_use.dec()
+
+    def read(self, statement_timeout_ms: Optional[int] = None):
+        """Acquire a replica (or primary) connection for a REST query"""
+        return self._acquire(self.read_pool, "read", statement_timeout_ms)
+
+    def write(self, statement_timeout_ms: Optional[int] = None):
+        """Acquire a primary connection for ingestion"""
+        return self._acquire(self.write_pool, "write", statement_timeout_ms)
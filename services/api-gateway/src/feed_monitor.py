@@ -0,0 +1,159 @@
+"""
+Feed integrity monitor.
+
+Watches every feed message as a hub listener and tracks, per symbol:
+sequence gaps and out-of-order arrivals (from the generator's ``feed_seq``
+per ``source``), time since the last update, and publish-to-receive latency.
+Negative latency beyond ``skew_tolerance`` means the generator's clock is
+ahead of ours.
+
+State changes (gap, stale, recovered, clock skew) are handed to ``on_alert``
+so the gateway can push them to WebSocket clients that opted in.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Optional
+import asyncio
+import time
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Weight of the newest sample in the latency moving average
+EWMA_ALPHA = 0.05
+# Minimum seconds between two gap alerts for the same symbol
+GAP_ALERT_INTERVAL = 1.0
+# A symbol counts as degraded for this long after its last gap
+GAP_DEGRADED_WINDOW = 60.0
+
+
+class SymbolHealth:
+    __slots__ = (
+        "source", "last_seq", "received", "gaps", "missing", "out_of_order",
+        "last_update", "latency_last", "latency_ewma", "latency_max",
+        "stale", "skewed", "last_gap", "last_gap_alert",
+    )
+
+    def __init__(self):
+        self.source: Optional[str] = None
+        self.last_seq = 0
+        self.received = 0
+        self.gaps = 0
+        self.missing = 0
+        self.out_of_order = 0
+        self.last_update = 0.0
+        self.latency_last = 0.0
+        self.latency_ewma = 0.0
+        self.latency_max = 0.0
+        self.stale = False
+        self.skewed = False
+        self.last_gap = 0.0
+        self.last_gap_alert = 0.0
+
+
+class FeedMonitor:
+    def __init__(self, stale_after: float = 5.0, skew_tolerance: float = 0.25, check_interval: float = 1.0):
+        self.stale_after = stale_after
+        self.skew_tolerance = skew_tolerance
+        self.check_interval = check_interval
+        self.symbols: Dict[str, SymbolHealth] = {}
+        self.on_alert: Optional[Callable[[str, dict], None]] = None
+        self._task = None
+
+    def observe(self, message: dict):
+        """Hub listener: account for one received message"""
+        now = time.time()
+        symbol = message["symbol"]
+        health = self.symbols.get(symbol)
+        if health is None:
+            health = self.symbols[symbol] = SymbolHealth()
+
+        health.received += 1
+        health.last_update = now
+        if health.stale:
+            health.stale = False
+            self._alert(symbol, "recovered", {})
+
+        seq = message.get("feed_seq")
+        if seq is not None:
+            source = message.get("source")
+            if source != health.source:
+                # New generator instance (or first message): restart sequence tracking
+                health.source = source
+                health.last_seq = seq
+            elif seq == health.last_seq + 1:
+                health.last_seq = seq
+            elif seq > health.last_seq:
+                missed = seq - health.last_seq - 1
+                health.gaps += 1
+                health.missing += missed
+                health.last_seq = seq
+                health.last_gap = now
+                if now - health.last_gap_alert >= GAP_ALERT_INTERVAL:
+                    health.last_gap_alert = now
+                    self._alert(symbol, "gap", {"missing": missed, "feed_seq": seq})
+            else:
+                health.out_of_order += 1
+
+        # Feed timestamps are naive UTC
+        published = datetime.fromisoformat(message["timestamp"])
+        latency = now - (published - _EPOCH).total_seconds()
+        health.latency_last = latency
+        health.latency_ewma += EWMA_ALPHA * (latency - health.latency_ewma)
+        if latency > health.latency_max:
+            health.latency_max = latency
+        skewed = latency < -self.skew_tolerance
+        if skewed != health.skewed:
+            health.skewed = skewed
+            if skewed:
+                self._alert(symbol, "clock_skew", {"latency_ms": round(latency * 1000, 3)})
+
+    def _alert(self, symbol: str, kind: str, detail: dict):
+        if self.on_alert is not None:
+            alert = {"type": "feed_alert", "symbol": symbol, "alert": kind}
+            alert.update(detail)
+            self.on_alert(symbol, alert)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            now = time.time()
+            for symbol, health in self.symbols.items():
+                age = now - health.last_update
+                if not health.stale and age > self.stale_after:
+                    health.stale = True
+                    self._alert(symbol, "stale", {"age_seconds": round(age, 3)})
+
+    def report(self) -> dict:
+        now = time.time()
+        symbols = {}
+        for symbol, h in sorted(self.symbols.items()):
+            symbols[symbol] = {
+                "source": h.source,
+                "last_feed_seq": h.last_seq,
+                "received": h.received,
+                "gaps": h.gaps,
+                "missing": h.missing,
+                "out_of_order": h.out_of_order,
+                "recent_gap": now - h.last_gap < GAP_DEGRADED_WINDOW,
+                "last_update_age_seconds": round(now - h.last_update, 3),
+                "stale": h.stale,
+                "clock_skew": h.skewed,
+                "latency_ms": {
+                    "last": round(h.latency_last * 1000, 3),
+                    "ewma": round(h.latency_ewma * 1000, 3),
+                    "max": round(h.latency_max * 1000, 3),
+                },
+            }
+        degraded = any(s["stale"] or s["clock_skew"] or s["recent_gap"] for s in symbols.values())
+        return {"status": "degraded" if degraded else "ok", "symbols": symbols}
+
@@ -0,0 +1,134 @@
+"""
+HTTP caching helpers: strong ETags, conditional requests and the
+in-memory, precompressed dashboard asset store.
+"""
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from .compression import brotli, compress, negotiate_encoding
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+
+# The HTML shell must revalidate so new asset fingerprints are picked up;
+# fingerprinted assets never change under the same URL.
+HTML_CACHE_CONTROL = "no-cache"
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+ASSET_UNVERSIONED_CACHE_CONTROL = "public, max-age=300"
+HISTORICAL_CACHE_CONTROL = "public, max-age=86400, immutable"
+LIVE_CACHE_CONTROL = "no-cache"
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Evaluate If-None-Match using the weak comparison RFC 9110 requires"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def cached_json(request: Request, payload, cache_control: str = LIVE_CACHE_CONTROL) -> Response:
+    """Serialize a payload once, tag it, and answer 304 when the client already has it"""
+    return cached_body(request, JSONResponse(content=jsonable_encoder(payload)).body, cache_control)
+
+
+def cached_body(request: Request, body: bytes, cache_control: str = LIVE_CACHE_CONTROL) -> Response:
+    """``cached_json`` for a body that is already serialized JSON"""
+    etag = make_etag(body)
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def json_asset(name: str, payload) -> "_Asset":
+    """A JSON document that never changes for the life of the process, precompressed once"""
+    body = JSONResponse(content=jsonable_encoder(payload)).body
+    return _Asset(name, body)
+
+
+def asset_response(request: Request, asset: "_Asset", cache_control: str) -> Response:
+    """Serve the best precompressed variant the client accepts, or 304"""
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding not in asset.variants:
+        encoding = None
+    body, etag = asset.variants[encoding]
+
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=asset.media_type, headers=headers)
+
+
+class _Asset:
+    __slots__ = ("name", "media_type", "fingerprint", "variants")
+
+    def __init__(self, name: str, body: bytes):
+        self.name = name
+        self.media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.fingerprint = hashlib.sha256(body).hexdigest()[:12]
+        # encoding -> (body, etag); each representation gets its own strong ETag
+        self.variants: Dict[Optional[str], tuple] = {None: (body, make_etag(body))}
+        for encoding in ("gzip", "br"):
+            if encoding == "br" and brotli is None:
+                continue
+            encoded = compress(body, encoding, gzip_level=9, brotli_quality=11)
+            if len(encoded) < len(body):
+                self.variants[encoding] = (encoded, make_etag(encoded))
+
+
+class StaticAssets:
+    """Dashboard files loaded, fingerprinted and precompressed once at import"""
+
+    def __init__(self, directory: Path = STATIC_DIR, index: str = "index.html"):
+        self.assets: Dict[str, _Asset] = {}
+        sources = {p.name: p.read_bytes() for p in sorted(directory.iterdir()) if p.is_file()}
+
+        for name, body in sources.items():
+            if name != index:
+                self.assets[name] = _Asset(name, body)
+
+        # Rewrite {{asset}} placeholders in the shell to fingerprinted URLs
+        shell = sources[index].decode("utf-8")
+        for name, asset in self.assets.items():
+            shell = shell.replace("{{" + name + "}}", f"/static/{name}?v={asset.fingerprint}")
+        self.index = _Asset(index, shell.encode("utf-8"))
+
+    def index_response(self, request: Request) -> Response:
+        return asset_response(request, self.index, HTML_CACHE_CONTROL)
+
+    def asset_response(self, request: Request, name: str) -> Optional[Response]:
+        asset = self.assets.get(name)
+        if asset is None:
+            return None
+        versioned = request.query_params.get("v") == asset.fingerprint
+        cache_control = ASSET_CACHE_CONTROL if versioned else ASSET_UNVERSIONED_CACHE_CONTROL
+        return asset_response(request, asset, cache_control)
@@ -0,0 +1,251 @@
+"""
+Per-worker fan-out hub.
+
+Each worker process holds one Redis pattern subscription (``market:*`` and
+``book:*``) and fans every message out to the WebSocket subscribers of that symbol through
+bounded per-client queues. A slow client only ever loses its own oldest
+messages; it never stalls the hub or other clients.
+
+The hub also stamps every message with a per-symbol sequence number and
+keeps the last ``history_size`` stamped messages per symbol, so a client that
+reconnects with its last seen sequence can have the gap replayed. Sequences
+are only meaningful within one hub ``epoch``.
+
+Besides symbols, the hub carries other keyed channels with the same
+sequencing, replay and per-client queues: order book updates arriving on
+``book:*`` (keyed by their Redis channel, e.g. ``book:AAPL``, and passed to
+listeners like any feed message), and channels derived in-process (for
+example ``indicators:AAPL``) through ``publish``, which skip the listeners.
+"""
+from collections import deque
+from itertools import islice
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import time
+import uuid
+
+from . import metrics
+
+CHANNEL_PREFIX = "market:"
+# Redis channels the hub subscribes to; market:{symbol} is keyed by the bare symbol
+FEED_PATTERNS = (f"{CHANNEL_PREFIX}*", "book:*")
+
+
+class Subscription:
+    """One client's view of a symbol.
+
+    By default every message is queued as ``(text, parsed)``. With
+    ``conflate=True`` only the latest message of each type is kept until the
+    client's sender picks it up, which is how per-client rate limits work.
+    """
+    __slots__ = (
+        "symbol", "queue", "sent", "dropped", "conflate", "pending", "ready", "conflated",
+        "alerts", "sent_counter", "dropped_counter",
+    )
+
+    def __init__(self, symbol: str, maxsize: int, conflate: bool = False, alerts: bool = False):
+        self.symbol = symbol
+        self.alerts = alerts
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.sent = 0
+        self.dropped = 0
+        self.sent_counter = metrics.SENT_BY_SYMBOL[symbol]
+        self.dropped_counter = metrics.DROPPED_BY_SYMBOL[symbol]
+        self.conflate = conflate
+        self.pending: Dict[str, Tuple[str, dict]] = {}
+        self.ready = asyncio.Event()
+        self.conflated = 0
+
+    def offer(self, text: str, parsed: dict):
+        """Enqueue without blocking, discarding the oldest message when full"""
+        if self.conflate:
+            if parsed["type"] in self.pending:
+                self.conflated += 1
+            self.pending[parsed["type"]] = (text, parsed)
+            self.ready.set()
+            return
+        try:
+            self.queue.put_nowait((text, parsed))
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait((text, parsed))
+            self.dropped += 1
+            self.dropped_counter.inc()
+
+    def take_pending(self) -> List[Tuple[str, dict]]:
+        items = list(self.pending.values())
+        self.pending.clear()
+        self.ready.clear()
+        return items
+
+
+class FanoutHub:
+    def __init__(self, redis_client, queue_size: int = 1000, history_size: int = 1000):
+        self.redis = redis_client
+        self.queue_size = queue_size
+        self.history_size = history_size
+        self.epoch = uuid.uuid4().hex[:12]
+        self.subscribers: Dict[str, Set[Subscription]] = {}
+        self.sequences: Dict[str, int] = {}
+        # symbol -> ring buffer of (seq, text), oldest first
+        self.history: Dict[str, Deque[Tuple[int, str]]] = {}
+        # Called with every parsed feed message (cache, ingestion, ...)
+        self.listeners: List[Callable[[dict], None]] = []
+        self.received = 0
+        self.malformed = 0
+        # listener name -> exceptions raised
+        self.listener_errors: Dict[str, int] = {}
+        self.sent = 0
+        # Drops by clients that have since disconnected
+        self.dropped_closed = 0
+        self._task = None
+
+    @property
+    def client_count(self) -> int:
+        return sum(len(subs) for subs in self.subscribers.values())
+
+    @property
+    def dropped(self) -> int:
+        live = sum(sub.dropped for subs in self.subscribers.values() for sub in subs)
+        return self.dropped_closed + live
+
+    def subscribe(self, symbol: str, conflate: bool = False, alerts: bool = False) -> Subscription:
+        sub = Subscription(symbol, self.queue_size, conflate, alerts)
+        self.subscribers.setdefault(symbol, set()).add(sub)
+        metrics.WS_CLIENTS.inc()
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        subs = self.subscribers.get(sub.symbol)
+        if subs is not None and sub in subs:
+            subs.discard(sub)
+            if not subs:
+                del self.subscribers[sub.symbol]
+            self.dropped_closed += sub.dropped
+            metrics.WS_CLIENTS.dec()
+            metrics.CLIENT_MESSAGES_SENT.observe(sub.sent)
+            metrics.CLIENT_MESSAGES_DROPPED.observe(sub.dropped)
+
+    def broadcast_alert(self, symbol: str, alert: dict):
+        """Deliver an out-of-band alert (unsequenced) to subscribers that opted in"""
+        subs = self.subscribers.get(symbol)
+        if subs:
+            text = json.dumps(alert)
+            for sub in subs:
+                if sub.alerts:
+                    sub.offer(text, alert)
+
+    def replay(self, symbol: str, last_seq: int) -> Optional[List[str]]:
+        """Messages published after ``last_seq``, or None if the ring no longer covers the gap"""
+        current = self.sequences.get(symbol, 0)
+        if last_seq == current:
+            return []
+        ring = self.history.get(symbol)
+        if not ring or last_seq > current or last_seq < ring[0][0] - 1:
+            return None
+        offset = last_seq - ring[0][0] + 1
+        return [text for _, text in islice(ring, offset, None)]
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.psubscribe(*FEED_PATTERNS)
+                print(f"✅ Fan-out hub subscribed to {', '.join(FEED_PATTERNS)}")
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self.dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Fan-out hub error, resubscribing: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    def dispatch(self, channel: bytes, data: bytes):
+        """Parse once, stamp a sequence, notify listeners, and enqueue the text for each subscriber"""
+        started = time.perf_counter()
+        self.received += 1
+        key = channel.decode("utf-8")
+        if key.startswith(CHANNEL_PREFIX):
+            key = key[len(CHANNEL_PREFIX):]
+        metrics.RECEIVED_BY_CHANNEL[key].inc()
+
+        try:
+            text = data.decode("utf-8")
+            parsed = json.loads(text)
+        except ValueError:
+            parsed = None
+        if not isinstance(parsed, dict):
+            # Skipped before stamping, so the message leaves no gap in the sequence
+            self.malformed += 1
+            metrics.FEED_ERRORS.labels("malformed").inc()
+            if self.malformed == 1 or self.malformed % 1000 == 0:
+                print(f"⚠️ Skipped malformed message on {key} ({self.malformed} so far): {data[:200]!r}")
+            return
+        text = self._stamp(key, text, parsed)
+
+        # A failing listener must never hold back delivery to subscribers
+        for listener in self.listeners:
+            try:
+                listener(parsed)
+            except Exception as e:
+                self._listener_failed(listener, e)
+
+        self._fan_out(key, text, parsed)
+        metrics.FANOUT_SECONDS.observe(time.perf_counter() - started)
+
+    def _listener_failed(self, listener: Callable[[dict], None], error: Exception):
+        name = getattr(listener, "__qualname__", type(listener).__name__)
+        count = self.listener_errors.get(name, 0) + 1
+        self.listener_errors[name] = count
+        metrics.FEED_ERRORS.labels(name).inc()
+        if count == 1 or count % 1000 == 0:
+            print(f"❌ Hub listener {name} failed ({count} so far): {type(error).__name__}: {error}")
+
+    def publish(self, key: str, message: dict, buffered: bool = True):
+        """Sequence, buffer and fan out a message derived in-process (e.g. ``indicators:AAPL``)
+
+        ``buffered=False`` skips the replay ring, for channels whose clients
+        resync from a snapshot rather than replaying (large frames).
+        """
+        text = self._stamp(key, json.dumps(message), message, buffered)
+        self._fan_out(key, text, message)
+
+    def _stamp(self, key: str, text: str, parsed: dict, buffered: bool = True) -> str:
+        seq = self.sequences.get(key, 0) + 1
+        self.sequences[key] = seq
+        body = text.rstrip()
+        # Splice the sequence into the object rather than re-serializing it,
+        # unless it is empty or already carries a seq the splice would repeat
+        splice = bool(parsed) and "seq" not in parsed and body.endswith("}")
+        parsed["seq"] = seq
+        text = f'{body[:-1]}, "seq": {seq}}}' if splice else json.dumps(parsed)
+
+        if not buffered:
+            return text
+        ring = self.history.get(key)
+        if ring is None:
+            ring = self.history[key] = deque(maxlen=self.history_size)
+        ring.append((seq, text))
+        return text
+
+    def _fan_out(self, key: str, text: str, parsed: dict):
+        subs = self.subscribers.get(key)
+        if subs:
+            for sub in subs:
+                sub.offer(text, parsed)
@@ -0,0 +1,185 @@
+"""
+Incremental technical indicators, computed once per worker from the trade
+feed and published on derived ``indicators:{symbol}`` hub channels.
+
+Every indicator updates in O(1) per trade:
+
+- EMA per configured period (``alpha = 2 / (period + 1)``)
+- RSI with Wilder smoothing, seeded by the simple average of the first
+  ``rsi_period`` changes
+- Bollinger bands from a sliding window's running sum and sum of squares
+- Rolling volatility: sample standard deviation of log returns over a window
+
+Sliding sums are rebuilt from their window every ``RESUM_INTERVAL`` updates
+(amortized O(1)) so floating-point drift cannot accumulate.
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+import math
+
+# Updates between exact recomputations of a sliding window's sums
+RESUM_INTERVAL = 1000
+
+
+@dataclass(frozen=True)
+class IndicatorConfig:
+    ema_periods: Tuple[int, ...] = (12, 26)
+    rsi_period: int = 14
+    bollinger_period: int = 20
+    bollinger_k: float = 2.0
+    volatility_window: int = 20
+
+
+class SlidingWindow:
+    """Fixed-size window with O(1) mean and standard deviation"""
+    __slots__ = ("size", "values", "total", "total_sq", "updates")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.updates = 0
+
+    def push(self, value: float):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        self.updates += 1
+        if self.updates % RESUM_INTERVAL == 0:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self) -> float:
+        return self.total / len(self.values)
+
+    def std(self, ddof: int = 0) -> float:
+        n = len(self.values)
+        if n - ddof <= 0:
+            return 0.0
+        variance = (self.total_sq - self.total * self.total / n) / (n - ddof)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class SymbolIndicators:
+    __slots__ = (
+        "config", "alphas", "emas", "last_price", "changes", "avg_gain", "avg_loss",
+        "prices", "returns", "updates", "timestamp",
+    )
+
+    def __init__(self, config: IndicatorConfig):
+        self.config = config
+        self.alphas = {period: 2.0 / (period + 1) for period in config.ema_periods}
+        self.emas: Dict[int, Optional[float]] = {period: None for period in config.ema_periods}
+        self.last_price: Optional[float] = None
+        self.changes = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.prices = SlidingWindow(config.bollinger_period)
+        self.returns = SlidingWindow(config.volatility_window)
+        self.updates = 0
+        self.timestamp: Optional[str] = None
+
+    def update(self, price: float, timestamp: str):
+        self.updates += 1
+        self.timestamp = timestamp
+        for period, alpha in self.alphas.items():
+            ema = self.emas[period]
+            self.emas[period] = price if ema is None else ema + alpha * (price - ema)
+
+        last = self.last_price
+        if last is not None:
+            change = price - last
+            gain = change if change > 0 else 0.0
+            loss = -change if change < 0 else 0.0
+            period = self.config.rsi_period
+            self.changes += 1
+            if self.changes <= period:
+                # Seed with the simple average of the first `period` changes
+                self.avg_gain += gain / period
+                self.avg_loss += loss / period
+            else:
+                self.avg_gain += (gain - self.avg_gain) / period
+                self.avg_loss += (loss - self.avg_loss) / period
+            if last > 0 and price > 0:
+                self.returns.push(math.log(price / last))
+        self.last_price = price
+        self.prices.push(price)
+
+    def rsi(self) -> Optional[float]:
+        if self.changes < self.config.rsi_period:
+            return None
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else 50.0
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+    def bollinger(self) -> Optional[dict]:
+        if not self.prices.full:
+            return None
+        middle = self.prices.mean()
+        width = self.config.bollinger_k * self.prices.std()
+        return {"middle": middle, "upper": middle + width, "lower": middle - width}
+
+    def volatility(self) -> Optional[float]:
+        return self.returns.std(ddof=1) if self.returns.full else None
+
+    def to_dict(self, symbol: str) -> dict:
+        return {
+            "type": "indicators",
+            "symbol": symbol,
+            "price": self.last_price,
+            "ema": {str(period): ema for period, ema in self.emas.items()},
+            "rsi": self.rsi(),
+            "bollinger": self.bollinger(),
+            "volatility": self.volatility(),
+            "trades": self.updates,
+            "timestamp": self.timestamp,
+        }
+
+
+class IndicatorEngine:
+    """Hub listener: updates a symbol's indicators on each trade and publishes them"""
+
+    def __init__(self, config: IndicatorConfig = IndicatorConfig()):
+        self.config = config
+        self.symbols: Dict[str, SymbolIndicators] = {}
+        # Called with (channel key, message) for every update, e.g. hub.publish
+        self.publish: Optional[Callable[[str, dict], None]] = None
+
+    def update(self, symbol: str, price: float, timestamp: str) -> SymbolIndicators:
+        state = self.symbols.get(symbol)
+        if state is None:
+            state = self.symbols[symbol] = SymbolIndicators(self.config)
+        state.update(price, timestamp)
+        return state
+
+    def observe(self, message: dict):
+        if message["type"] != "trade":
+            return
+        symbol = message["symbol"]
+        state = self.update(symbol, message["price"], message["timestamp"])
+        if self.publish is not None:
+            self.publish(channel_key(symbol), state.to_dict(symbol))
+
+    def warm(self, trades_by_symbol: Dict[str, list]):
+        """Replay recent trades (oldest first) without publishing"""
+        for symbol, trades in trades_by_symbol.items():
+            for trade in trades:
+                self.update(symbol, trade["price"], trade["timestamp"])
+
+    def snapshot(self, symbol: str) -> Optional[dict]:
+        state = self.symbols.get(symbol)
+        return state.to_dict(symbol) if state is not None else None
+
+
+def channel_key(symbol: str) -> str:
+    return f"indicators:{symbol}"
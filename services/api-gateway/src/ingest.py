@@ -0,0 +1,114 @@
+"""
+Batched ingestion of feed messages into the primary database.
+
+Only the worker holding the ingestion lease submits messages here. Rows are
+buffered and written with one prepared ``executemany`` per table, either
+every ``flush_interval`` seconds or as soon as ``batch_size`` rows are
+waiting. A batch that fails to insert is dropped and counted, and at most
+``MAX_BUFFERED_BATCHES`` batches wait while the database is stalled; rows
+beyond that are dropped on arrival rather than growing memory without bound.
+"""
+from datetime import datetime
+import asyncio
+import time
+
+from . import metrics
+from .db import ConnectionManager, DatabaseTimeout, DatabaseUnavailable
+
+# Rows buffered before new ones are dropped, in multiples of the batch size
+MAX_BUFFERED_BATCHES = 20
+
+
+class IngestionWriter:
+    def __init__(self, db: ConnectionManager, batch_size: int = 500, flush_interval: float = 0.1):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.trades = []
+        self.quotes = []
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.max_buffered = MAX_BUFFERED_BATCHES * batch_size
+        self._overflowing = False
+        self._full = asyncio.Event()
+        self._timings = {
+            table: (metrics.DB_BATCH_ROWS.labels(table), metrics.DB_BATCH_SECONDS.labels(table))
+            for table in ("trades", "quotes")
+        }
+        self._task = None
+
+    def submit(self, message: dict):
+        if len(self.trades) + len(self.quotes) >= self.max_buffered:
+            self.rows_dropped += 1
+            metrics.INGEST_ROWS_DROPPED.labels("overflow").inc()
+            if not self._overflowing:
+                self._overflowing = True
+                print(f"⚠️ Ingestion buffer full ({self.max_buffered} rows); dropping new rows")
+            return
+        self._overflowing = False
+        timestamp = datetime.fromisoformat(message["timestamp"])
+        if message["type"] == "trade":
+            self.trades.append((
+                message["symbol"], message["price"], message["volume"], message["side"], timestamp
+            ))
+        elif message["type"] == "quote":
+            self.quotes.append((
+                message["symbol"], message["bid_price"], message["ask_price"],
+                message["bid_size"], message["ask_size"], timestamp
+            ))
+        else:
+            return
+        if len(self.trades) + len(self.quotes) >= self.batch_size:
+            self._full.set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+
+    async def flush(self):
+        trades, self.trades = self.trades, []
+        quotes, self.quotes = self.quotes, []
+        if not trades and not quotes:
+            return
+        try:
+            async with self.db.write() as conn:
+                if trades:
+                    await self._insert(conn.prepared["insert_trade"], "trades", trades)
+                if quotes:
+                    await self._insert(conn.prepared["insert_quote"], "quotes", quotes)
+            self.rows_written += len(trades) + len(quotes)
+        except (DatabaseUnavailable, DatabaseTimeout) as e:
+            self._drop(len(trades) + len(quotes), "unavailable")
+            print(f"⚠️ Dropped batch of {len(trades) + len(quotes)} rows: {e}")
+        except Exception as e:
+            # Lost connections, constraint violations, ...: never let them end the writer task
+            self._drop(len(trades) + len(quotes), "error")
+            print(f"❌ Dropped batch of {len(trades) + len(quotes)} rows: {type(e).__name__}: {e}")
+
+    def _drop(self, rows: int, reason: str):
+        self.rows_dropped += rows
+        metrics.INGEST_ROWS_DROPPED.labels(reason).inc(rows)
+
+    async def _insert(self, statement, table: str, rows: list):
+        batch_rows, batch_seconds = self._timings[table]
+        started = time.perf_counter()
+        await statement.executemany(rows)
+        batch_seconds.observe(time.perf_counter() - started)
+        batch_rows.observe(len(rows))
@@ -0,0 +1,82 @@
+"""
+Redis lease used to elect the single ingestion writer across workers.
+
+The holder renews the lease every ``ttl / 3``. If it dies or stalls, the key
+expires and another worker takes over within one TTL.
+"""
+from typing import Callable, Optional
+import asyncio
+import os
+import socket
+
+# Only touch the key if we still own it
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class RedisLease:
+    def __init__(self, redis_client, key: str, ttl_ms: int = 5000, owner: Optional[str] = None):
+        self.redis = redis_client
+        self.key = key
+        self.ttl_ms = ttl_ms
+        self.owner = owner or worker_id()
+        self.held = False
+        # Called with True on acquire and False on loss
+        self.on_change: Optional[Callable[[bool], None]] = None
+        self._renew = redis_client.register_script(RENEW_SCRIPT)
+        self._release = redis_client.register_script(RELEASE_SCRIPT)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.held:
+            await self._release(keys=[self.key], args=[self.owner])
+            self._set_held(False)
+
+    def _set_held(self, held: bool):
+        if held != self.held:
+            self.held = held
+            print(f"{'👑 Acquired' if held else '⚠️ Lost'} lease {self.key} ({self.owner})")
+            if self.on_change:
+                self.on_change(held)
+
+    async def _run(self):
+        interval = self.ttl_ms / 3000
+        while True:
+            try:
+                if self.held:
+                    renewed = await self._renew(keys=[self.key], args=[self.owner, self.ttl_ms])
+                    self._set_held(bool(renewed))
+                else:
+                    acquired = await self.redis.set(self.key, self.owner, nx=True, px=self.ttl_ms)
+                    self._set_held(bool(acquired))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Without Redis we cannot prove ownership, so stop writing
+                print(f"❌ Lease error: {e}")
+                self._set_held(False)
+            await asyncio.sleep(interval)
@@ -0,0 +1,162 @@
+"""
+Prometheus metrics for the gateway.
+
+Hot paths never call ``.labels()`` per event: label children are bound once
+(per symbol, route or table) and cached, so recording a sample is a single
+``inc()``/``observe()`` on a pre-existing object.
+
+In multi-worker mode set ``PROMETHEUS_MULTIPROC_DIR`` to a shared, empty
+directory; ``/metrics`` then aggregates every worker.
+"""
+from typing import Dict
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+# Sub-millisecond buckets for the in-process fan-out path
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+REST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BATCH_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+CLIENT_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+MESSAGES_RECEIVED = Counter(
+    "gateway_messages_received_total", "Feed messages received from Redis", ["channel"]
+)
+MESSAGES_SENT = Counter(
+    "gateway_messages_sent_total", "Messages written to WebSocket clients", ["symbol"]
+)
+MESSAGES_DROPPED = Counter(
+    "gateway_messages_dropped_total", "Messages dropped from full client queues", ["symbol"]
+)
+CLIENT_MESSAGES_SENT = Histogram(
+    "gateway_client_messages_sent", "Messages sent per client connection", buckets=CLIENT_BUCKETS
+)
+CLIENT_MESSAGES_DROPPED = Histogram(
+    "gateway_client_messages_dropped", "Messages dropped per client connection", buckets=CLIENT_BUCKETS
+)
+WS_CLIENTS = Gauge(
+    "gateway_ws_clients", "Connected WebSocket clients", multiprocess_mode="livesum"
+)
+FEED_ERRORS = Counter(
+    "gateway_feed_errors_total", "Malformed feed messages and hub listener failures", ["source"]
+)
+FANOUT_SECONDS = Histogram(
+    "gateway_fanout_seconds", "Time to parse, stamp and enqueue one feed message", buckets=FAST_BUCKETS
+)
+EVENT_LOOP_LAG = Histogram(
+    "gateway_event_loop_lag_seconds", "Event-loop scheduling delay of a periodic heartbeat", buckets=LAG_BUCKETS
+)
+ALERTS_REGISTERED = Gauge(
+    "gateway_alerts_registered", "Pending client price/spread alerts", multiprocess_mode="livesum"
+)
+ALERTS_FIRED = Counter(
+    "gateway_alerts_fired_total", "Client price/spread alerts fired"
+)
+COMPUTE_SECONDS = Histogram(
+    "gateway_compute_seconds", "Analytics job latency, inline or in the process pool", ["job", "mode"],
+    buckets=REST_BUCKETS
+)
+COMPUTE_REJECTED = Counter(
+    "gateway_compute_rejected_total", "Analytics jobs refused or killed", ["reason"]
+)
+RATE_LIMITED = Counter(
+    "gateway_rate_limited_total", "Requests and WebSockets refused by per-client limits", ["reason"]
+)
+
+DB_BATCH_ROWS = Histogram(
+    "gateway_db_insert_batch_rows", "Rows per ingestion insert batch", ["table"], buckets=BATCH_BUCKETS
+)
+DB_BATCH_SECONDS = Histogram(
+    "gateway_db_insert_batch_seconds", "Latency of one ingestion insert batch", ["table"], buckets=DB_BUCKETS
+)
+INGEST_ROWS_DROPPED = Counter(
+    "gateway_ingest_rows_dropped_total", "Feed rows never written to the database", ["reason"]
+)
+ARCHIVED_ROWS = Counter(
+    "gateway_archived_rows_total", "Rows moved from Postgres to the Parquet archive", ["table"]
+)
+DB_POOL_IN_USE = Gauge(
+    "gateway_db_pool_in_use", "Pool connections checked out", ["pool"], multiprocess_mode="livesum"
+)
+DB_POOL_WAITERS = Gauge(
+    "gateway_db_pool_waiters", "Tasks waiting for a pool connection", ["pool"], multiprocess_mode="livesum"
+)
+
+REST_SECONDS = Histogram(
+    "gateway_rest_request_seconds", "REST request latency", ["method", "route"], buckets=REST_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    "gateway_cache_requests_total", "Hot cache lookups", ["result"]
+)
+CACHE_HIT = CACHE_REQUESTS.labels("hit")
+CACHE_MISS = CACHE_REQUESTS.labels("miss")
+
+
+class BoundLabels:
+    """Memoizes the children of a single-label metric"""
+    __slots__ = ("metric", "children")
+
+    def __init__(self, metric):
+        self.metric = metric
+        self.children: Dict[str, object] = {}
+
+    def __getitem__(self, value: str):
+        child = self.children.get(value)
+        if child is None:
+            child = self.children[value] = self.metric.labels(value)
+        return child
+
+
+RECEIVED_BY_CHANNEL = BoundLabels(MESSAGES_RECEIVED)
+SENT_BY_SYMBOL = BoundLabels(MESSAGES_SENT)
+DROPPED_BY_SYMBOL = BoundLabels(MESSAGES_DROPPED)
+
+
+def render():
+    """Body and content type for the /metrics endpoint"""
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class RestMetricsMiddleware:
+    """ASGI middleware timing HTTP requests by method and route template"""
+
+    def __init__(self, app):
+        self.app = app
+        # method -> route path -> histogram child
+        self.children: Dict[str, Dict[str, object]] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            by_path = self.children.get(scope["method"])
+            if by_path is None:
+                by_path = self.children[scope["method"]] = {}
+            child = by_path.get(path)
+            if child is None:
+                child = by_path[path] = REST_SECONDS.labels(scope["method"], path)
+            child.observe(time.perf_counter() - started)
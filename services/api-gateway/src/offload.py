@@ -0,0 +1,76 @@
+"""
+Worker-process side of the analytics pool (see ``compute.py``).
+
+Job arguments are normally pickled through a pipe, which copies every
+array twice. Instead, ``SharedArrays`` packs a job's NumPy inputs into one
+shared-memory block and sends only the block name and layout. ``run_job``
+rebuilds the arrays over the same pages in the worker, so the data is never
+copied.
+
+This module is imported by the pool workers, so it must stay light: no
+metrics, no settings, nothing with import-time side effects.
+"""
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterator, List, Tuple
+import json
+
+import numpy as np
+
+# Each array starts on a multiple of this many bytes
+ALIGN = 64
+
+# (key, dtype, shape, byte offset) per array
+Layout = List[Tuple[str, str, Tuple[int, ...], int]]
+
+
+class SharedArrays:
+    """One shared-memory block holding a job's input arrays, owned by the caller"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.layout: Layout = []
+        size = 0
+        for key, array in arrays.items():
+            self.layout.append((key, array.dtype.str, array.shape, size))
+            size += -(-array.nbytes // ALIGN) * ALIGN
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for (key, dtype, shape, offset), array in zip(self.layout, arrays.values()):
+            np.ndarray(shape, dtype, buffer=self.shm.buf, offset=offset)[...] = array
+
+    @property
+    def spec(self) -> Tuple[str, Layout]:
+        return self.shm.name, self.layout
+
+    def close(self):
+        """Release and unlink the block (after the job has finished or been killed)"""
+        self.shm.close()
+        self.shm.unlink()
+
+
+@contextmanager
+def attached(spec: Tuple[str, Layout]) -> Iterator[Dict[str, np.ndarray]]:
+    """The arrays described by ``spec``, valid inside the block only"""
+    name, layout = spec
+    shm = shared_memory.SharedMemory(name=name)
+    arrays = {
+        key: np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)
+        for key, dtype, shape, offset in layout
+    }
+    try:
+        yield arrays
+    finally:
+        arrays.clear()
+        shm.close()
+
+
+def run_job(job: Callable[..., bytes], spec: Tuple[str, Layout], args: tuple) -> bytes:
+    """Pool entry point: ``job(arrays, *args)`` over the shared arrays"""
+    with attached(spec) as arrays:
+        return job(arrays, *args)
+
+
+def json_body(payload) -> bytes:
+    """The same bytes JSONResponse would render"""
+    return json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
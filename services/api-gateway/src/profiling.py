@@ -0,0 +1,191 @@
+"""
+In-process diagnostics: an on-demand sampling profiler and an event-loop lag
+monitor.
+
+``SamplingProfiler`` samples the event-loop thread's Python stack from a
+background thread (``sys._current_frames``), so it adds no overhead to the
+loop itself, and renders the samples as collapsed stacks ("folded" format)
+that flamegraph.pl, speedscope and inferno read directly.
+
+``LoopLagMonitor`` runs a heartbeat task on the loop and a watchdog thread.
+When the heartbeat is late by more than ``threshold`` the watchdog logs the
+task and stack that are holding the loop *while it is still blocked*.
+
+A copy lives in services/market-feed-generator/src/profiling.py (each service
+image is built from its own directory); keep the two in sync.
+"""
+from collections import Counter, deque
+from datetime import datetime
+from typing import Callable, Optional
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+# Frames kept per sample; deeper stacks are truncated at the root end
+MAX_DEPTH = 128
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def _folded_stack(frame) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class SamplingProfiler:
+    """Statistical profiler for one thread, started and stopped at runtime"""
+
+    def __init__(self, thread_id: Optional[int] = None):
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.samples: Counter = Counter()
+        self.interval = 0.005
+        self.started_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.005, max_seconds: float = 300.0):
+        """Begin sampling every ``interval`` seconds; stops by itself after ``max_seconds``"""
+        if self.running:
+            raise RuntimeError("profiler is already running")
+        self.samples = Counter()
+        self.interval = interval
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample, args=(max_seconds,), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self.folded()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "started_at": datetime.utcfromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            "samples": sum(self.samples.values()),
+        }
+
+    def _sample(self, max_seconds: float):
+        deadline = time.monotonic() + max_seconds
+        samples = self.samples
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                samples[_folded_stack(frame)] += 1
+            if time.monotonic() >= deadline:
+                break
+
+
+class LoopLagMonitor:
+    """Measures event-loop scheduling lag and reports what blocked the loop"""
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        interval: float = 0.05,
+        observe: Optional[Callable[[float], None]] = None,
+        name: str = "event loop"
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.observe = observe
+        self.name = name
+        self.lag_max = 0.0
+        self.lag_last = 0.0
+        self.stalls = 0
+        self.recent = deque(maxlen=20)
+        self._beat = 0.0
+        self._reported_beat = 0.0
+        self._loop = None
+        self._thread_id = None
+        self._task = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start from inside the loop being monitored"""
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog:
+            self._watchdog.join()
+
+    async def _heartbeat(self):
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._beat - self.interval)
+            self.lag_last = lag
+            if lag > self.lag_max:
+                self.lag_max = lag
+            if self.observe is not None:
+                self.observe(lag)
+
+    def _watch(self):
+        # Check often enough to catch the stall well before it ends
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked > self.threshold and beat != self._reported_beat:
+                self._reported_beat = beat
+                self._report(blocked)
+
+    def _report(self, blocked: float):
+        self.stalls += 1
+        task = asyncio.current_task(self._loop)
+        coro = task.get_coro() if task is not None else None
+        running = getattr(coro, "__qualname__", None) or (task.get_name() if task else "callback")
+        frame = sys._current_frames().get(self._thread_id)
+        stack = "".join(traceback.format_stack(frame, limit=12)) if frame is not None else ""
+        self.recent.append({
+            "timestamp": datetime.utcnow().isoformat(),
+            "blocked_ms": round(blocked * 1000, 1),
+            "task": running,
+            "stack": stack,
+        })
+        print(f"🐢 {self.name} blocked for {blocked * 1000:.0f} ms+ in {running}\n{stack}", end="")
+
+    def status(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "lag_last_ms": round(self.lag_last * 1000, 3),
+            "lag_max_ms": round(self.lag_max * 1000, 3),
+            "stalls": self.stalls,
+            "recent": list(self.recent),
+        }
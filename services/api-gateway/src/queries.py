@@ -0,0 +1,122 @@
+"""
+Hot-path SQL, prepared on every pool connection when it is opened.
+
+Handlers call ``conn.prepared[name]`` instead of sending query text, so the
+first request on a fresh connection pays no parse/plan round trip.
+"""
+
+READ_QUERIES = {
+    "ping": "SELECT 1",
+    "recent_quotes": """
+        SELECT * FROM quotes
+        WHERE symbol = $1
+        ORDER BY time DESC, id DESC
+        LIMIT $2
+    """,
+    # Open ends are passed as datetime.min/max (-infinity/infinity), so the
+    # bounds stay sargable instead of "$2 IS NULL OR ..." generic plans
+    "range_quotes": """
+        SELECT * FROM quotes
+        WHERE symbol = $1 AND time >= $2 AND time < $3
+        ORDER BY time DESC, id DESC
+        LIMIT $4
+    """,
+    "recent_trades": """
+        SELECT * FROM trades
+        WHERE symbol = $1
+        ORDER BY time DESC, id DESC
+        LIMIT $2
+    """,
+    # Open ends are passed as datetime.min/max (-infinity/infinity), so the
+    # bounds stay sargable instead of "$2 IS NULL OR ..." generic plans
+    "range_trades": """
+        SELECT * FROM trades
+        WHERE symbol = $1 AND time >= $2 AND time < $3
+        ORDER BY time DESC, id DESC
+        LIMIT $4
+    """,
+    "latest_trades": """
+        WITH latest_trades AS (
+            SELECT DISTINCT ON (symbol)
+                symbol, price, time
+            FROM trades
+            ORDER BY symbol, time DESC
+        )
+        SELECT * FROM latest_trades
+        ORDER BY symbol
+    """,
+    # Read through a cursor by /api/series
+    "series_trades": """
+        SELECT extract(epoch FROM time)::float8 AS t, price FROM trades
+        WHERE symbol = $1 AND time >= $2 AND time < $3
+        ORDER BY time, id
+    """,
+    # Hot-window part of /api/history, same columns as ParquetArchive.trade_bars
+    "history_bars": """
+        SELECT
+            floor(extract(epoch FROM time)::float8 / $4::float8) * $4::float8 AS bucket,
+            (array_agg(price ORDER BY time, id))[1] AS open,
+            max(price) AS high,
+            min(price) AS low,
+            (array_agg(price ORDER BY time DESC, id DESC))[1] AS close,
+            sum(volume)::bigint AS volume,
+            sum(price * volume) / nullif(sum(volume), 0) AS vwap,
+            count(*) AS trades
+        FROM trades
+        WHERE symbol = $1 AND time >= $2 AND time < $3
+        GROUP BY bucket
+        ORDER BY bucket
+    """,
+    # Keyset-paged chunks for historical replay: rows after ($2, $3) in (time, id) order
+    "replay_trades": """
+        SELECT id, time, symbol, price, volume, side FROM trades
+        WHERE symbol = ANY($1::text[])
+        AND time >= $2 AND (time, id) > ($2, $3)
+        AND time < $4
+        ORDER BY time, id
+        LIMIT $5
+    """,
+    "replay_quotes": """
+        SELECT id, time, symbol, bid_price, ask_price, bid_size, ask_size FROM quotes
+        WHERE symbol = ANY($1::text[])
+        AND time >= $2 AND (time, id) > ($2, $3)
+        AND time < $4
+        ORDER BY time, id
+        LIMIT $5
+    """,
+    "symbol_stats": """
+        SELECT
+            COUNT(*) as total_trades,
+            AVG(price) as avg_price,
+            MIN(price) as min_price,
+            MAX(price) as max_price,
+            SUM(volume) as total_volume,
+            MAX(time) as last_trade_time
+        FROM trades
+        WHERE symbol = $1
+        AND time > NOW() - INTERVAL '1 hour'
+    """,
+    # Warm start of the summary channel: the day so far per symbol
+    "day_summary": """
+        SELECT
+            symbol,
+            (array_agg(price ORDER BY time, id))[1] AS open,
+            sum(volume)::bigint AS volume,
+            count(*) AS trades
+        FROM trades
+        WHERE time >= $1
+        GROUP BY symbol
+    """,
+}
+
+WRITE_QUERIES = {
+    "ping": "SELECT 1",
+    "insert_trade": """
+        INSERT INTO trades (symbol, price, volume, side, time)
+        VALUES ($1, $2, $3, $4, $5)
+    """,
+    "insert_quote": """
+        INSERT INTO quotes (symbol, bid_price, ask_price, bid_size, ask_size, time)
+        VALUES ($1, $2, $3, $4, $5, $6)
+    """,
+}
@@ -0,0 +1,358 @@
+"""
+Per-client rate limiting, concurrency caps and WebSocket quotas.
+
+Clients are identified by their ``X-API-Key`` header (or ``api_key`` query
+parameter, since browsers cannot set headers on WebSockets), else by IP.
+
+- Token bucket: ``rate`` requests per second with bursts of up to ``burst``.
+  The bucket lives in Redis so every gateway worker draws from the same
+  budget. Workers do not ask Redis on every request, though: they lease
+  ``lease`` tokens at a time and spend them locally. A refused client is also
+  remembered locally until its retry time, so a client hammering the API
+  costs one dictionary lookup per request, not one Redis round trip. If
+  Redis is unreachable, each worker falls back to a local bucket.
+- Concurrency: at most ``concurrency`` REST requests in flight per client
+  per worker, so one client cannot hold every pool connection.
+- WebSocket quota: at most ``ws_connections`` open sockets per client
+  across all workers. Each socket holds an entry in a Redis sorted set,
+  scored by an expiry that its worker keeps pushing forward, so the sockets
+  of a crashed worker stop counting after ``SOCKET_TTL_MS``.
+
+REST requests over a limit get ``429`` with ``Retry-After``. WebSockets are
+accepted and closed with code 4429, carrying the retry delay in the reason.
+"""
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import time
+
+from . import metrics
+from .leader import worker_id
+
+# KEYS[1]: bucket hash. ARGV: rate (tokens/s), burst, tokens wanted.
+# Returns {tokens granted, ms until one token is available}.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local granted = math.min(wanted, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+if granted > 0 then
+    return {granted, 0}
+end
+return {0, math.ceil((1 - tokens) * 1000 / rate)}
+"""
+
+# KEYS[1]: sorted set of a client's sockets. ARGV: now ms, ttl ms, quota, member.
+ADMIT_SOCKET_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], tonumber(ARGV[1]) + tonumber(ARGV[2]), ARGV[4])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# A socket's quota entry lapses this long after its worker last renewed it
+SOCKET_TTL_MS = 60000
+# Idle client state is dropped after this many seconds
+CLIENT_IDLE_SECONDS = 60.0
+
+# Tokens per request; everything else under /api costs 1
+ROUTE_COSTS = (
+    ("/api/series/", 5),
+    ("/api/history/", 5),
+    ("/api/correlation", 5),
+)
+
+
+def client_id(scope) -> str:
+    """``key:<hash>`` for API-key clients, else ``ip:<address>``"""
+    api_key = None
+    for name, value in scope.get("headers", ()):
+        if name == b"x-api-key":
+            api_key = value
+            break
+    if api_key is None and scope.get("query_string"):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("api_key")
+        if values:
+            api_key = values[0].encode()
+    if api_key:
+        return "key:" + hashlib.sha256(api_key).hexdigest()[:16]
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+def route_cost(path: str) -> int:
+    for prefix, cost in ROUTE_COSTS:
+        if path.startswith(prefix):
+            return cost
+    return 1
+
+
+class ClientState:
+    __slots__ = ("leased", "blocked_until", "tokens", "refilled", "in_flight", "sockets", "last_seen")
+
+    def __init__(self, burst: float, now: float):
+        self.leased = 0           # tokens leased from Redis, not yet spent
+        self.blocked_until = 0.0  # refused until then (monotonic)
+        self.tokens = burst       # local bucket, used without Redis
+        self.refilled = now
+        self.in_flight = 0
+        self.sockets: Dict[str, str] = {}  # quota member -> Redis key
+        self.last_seen = now
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        rate: float = 20.0,
+        burst: float = 40.0,
+        lease: int = 5,
+        concurrency: int = 4,
+        ws_connections: int = 50,
+        prefix: str = "ratelimit",
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.lease = lease
+        self.concurrency = concurrency
+        self.ws_connections = ws_connections
+        self.prefix = prefix
+        self.enabled = rate > 0
+        self.redis = None
+        self.degraded = False
+        self.clients: Dict[str, ClientState] = {}
+        self._members = itertools.count()
+        self._owner = worker_id()
+        self._bucket = None
+        self._admit = None
+        self._task = None
+
+    def attach(self, redis_client):
+        """Share buckets and socket quotas through Redis from now on"""
+        self.redis = redis_client
+        self._bucket = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._admit = redis_client.register_script(ADMIT_SOCKET_SCRIPT)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def _state(self, client: str) -> ClientState:
+        now = time.monotonic()
+        state = self.clients.get(client)
+        if state is None:
+            state = self.clients[client] = ClientState(self.burst, now)
+        state.last_seen = now
+        return state
+
+    def _set_degraded(self, degraded: bool, error: Optional[Exception] = None):
+        if degraded != self.degraded:
+            self.degraded = degraded
+            if degraded:
+                print(f"⚠️ Rate limiter using local buckets (Redis error: {error})")
+            else:
+                print("✅ Rate limiter back on shared Redis buckets")
+
+    async def take(self, client: str, cost: int = 1) -> float:
+        """Spend ``cost`` tokens: 0 if allowed, else seconds until retrying makes sense"""
+        state = self._state(client)
+        now = state.last_seen
+        if now < state.blocked_until:
+            return state.blocked_until - now
+        if state.leased >= cost:
+            state.leased -= cost
+            return 0.0
+        if self.redis is None:
+            return self._take_local(state, cost, now)
+        try:
+            granted, wait_ms = await self._bucket(
+                keys=[f"{self.prefix}:bucket:{client}"],
+                args=[self.rate, self.burst, max(cost - state.leased, self.lease)],
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._set_degraded(True, e)
+            return self._take_local(state, cost, now)
+        self._set_degraded(False)
+        state.leased += int(granted)
+        if state.leased >= cost:
+            state.leased -= cost
+            return 0.0
+        wait = max(int(wait_ms) / 1000, (cost - state.leased) / self.rate)
+        state.blocked_until = now + wait
+        return wait
+
+    def _take_local(self, state: ClientState, cost: int, now: float) -> float:
+        state.tokens = min(self.burst, state.tokens + (now - state.refilled) * self.rate)
+        state.refilled = now
+        if state.tokens >= cost:
+            state.tokens -= cost
+            return 0.0
+        wait = (cost - state.tokens) / self.rate
+        state.blocked_until = now + wait
+        return wait
+
+    def enter(self, client: str) -> bool:
+        """Start a REST request unless the client is at its concurrency cap"""
+        state = self._state(client)
+        if state.in_flight >= self.concurrency:
+            return False
+        state.in_flight += 1
+        return True
+
+    def leave(self, client: str):
+        self.clients[client].in_flight -= 1
+
+    async def admit_socket(self, client: str) -> Optional[str]:
+        """Quota member for a new WebSocket, or None if the client has its quota open"""
+        state = self._state(client)
+        member = f"{self._owner}:{next(self._members)}"
+        key = f"{self.prefix}:sockets:{client}"
+        if self.redis is not None:
+            try:
+                admitted = await self._admit(
+                    keys=[key], args=[int(time.time() * 1000), SOCKET_TTL_MS, self.ws_connections, member]
+                )
+                self._set_degraded(False)
+                if not admitted:
+                    return None
+                state.sockets[member] = key
+                return member
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._set_degraded(True, e)
+        # Local fallback: this worker's sockets only
+        if len(state.sockets) >= self.ws_connections:
+            return None
+        state.sockets[member] = ""
+        return member
+
+    async def release_socket(self, client: str, member: str):
+        state = self.clients.get(client)
+        key = state.sockets.pop(member, "") if state else ""
+        if key and self.redis is not None:
+            try:
+                await self.redis.zrem(key, member)
+            except Exception:
+                pass  # the entry lapses after SOCKET_TTL_MS anyway
+
+    async def _run(self):
+        """Renew this worker's socket entries and drop idle client state"""
+        while True:
+            await asyncio.sleep(SOCKET_TTL_MS / 3000)
+            now = time.monotonic()
+            expires = int(time.time() * 1000) + SOCKET_TTL_MS
+            renewals = []
+            for client, state in list(self.clients.items()):
+                if state.sockets:
+                    renewals.extend((key, member) for member, key in state.sockets.items() if key)
+                elif not state.in_flight and now - state.last_seen > CLIENT_IDLE_SECONDS:
+                    del self.clients[client]
+            if renewals and self.redis is not None:
+                try:
+                    async with self.redis.pipeline(transaction=False) as pipe:
+                        for key, member in renewals:
+                            pipe.zadd(key, {member: expires}, xx=True)
+                            pipe.pexpire(key, SOCKET_TTL_MS)
+                        await pipe.execute()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"❌ Socket quota renewal failed: {e}")
+
+
+async def _send_json(send, status: int, payload: dict, headers: Tuple[Tuple[bytes, bytes], ...] = ()):
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying a RateLimiter to /api requests and every WebSocket"""
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        limiter = self.limiter
+        if not limiter.enabled or scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        if scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+            return
+        if not scope["path"].startswith("/api"):
+            await self.app(scope, receive, send)
+            return
+
+        client = client_id(scope)
+        wait = await limiter.take(client, route_cost(scope["path"]))
+        if wait:
+            metrics.RATE_LIMITED.labels("rate").inc()
+            await _send_json(
+                send, 429, {"detail": "Rate limit exceeded"},
+                ((b"retry-after", str(math.ceil(wait)).encode()),),
+            )
+            return
+        if not limiter.enter(client):
+            metrics.RATE_LIMITED.labels("concurrency").inc()
+            await _send_json(
+                send, 429, {"detail": f"More than {limiter.concurrency} concurrent requests"},
+                ((b"retry-after", b"1"),),
+            )
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.leave(client)
+
+    async def _websocket(self, scope, receive, send):
+        limiter = self.limiter
+        client = client_id(scope)
+        wait = await limiter.take(client)
+        member = None if wait else await limiter.admit_socket(client)
+        if member is None:
+            metrics.RATE_LIMITED.labels("rate" if wait else "websocket_quota").inc()
+            reason = (
+                f"Rate limit exceeded; retry after {math.ceil(wait)}s" if wait
+                else f"More than {limiter.ws_connections} open WebSockets"
+            )
+            # Accept first so the client sees the close code (a refused
+            # handshake is only an HTTP 403)
+            await receive()
+            await send({"type": "websocket.accept"})
+            await send({"type": "websocket.close", "code": 4429, "reason": reason})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await limiter.release_socket(client, member)
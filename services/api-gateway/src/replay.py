@@ -0,0 +1,210 @@
+"""
+Historical replay of stored trades and quotes over a WebSocket.
+
+Each table is read in keyset-paged chunks (``ORDER BY time, id``, resuming
+after the last row of the previous chunk) on a short-lived read-pool
+connection per chunk, so a long replay never pins a pooled connection. A
+producer task per table keeps up to ``prefetch`` chunks queued ahead of the
+sender: memory stays bounded by ``chunk_size * (prefetch + 1)`` rows per
+table, and the next chunk is normally already in memory when the current one
+runs out, so playback does not wait on a database round trip.
+
+Days older than the archive watermark are read the same way from the
+Parquet archive (on a worker thread) before the rest comes from Postgres.
+
+The two tables, each already in time order across all requested symbols,
+are merged with a heap and paced against the wall clock at ``speed`` times
+real time (or as fast as the client reads, with ``speed=None``).
+"""
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+import asyncio
+import heapq
+import json
+
+from .archive import naive_utc
+
+# Messages sent between forced yields to the event loop at max speed
+YIELD_EVERY = 500
+
+
+def _timestamp(value: datetime) -> str:
+    """Naive UTC ISO timestamp, as the live feed sends it"""
+    return value.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def trade_message(row) -> dict:
+    return {
+        "type": "trade",
+        "symbol": row["symbol"],
+        "price": row["price"],
+        "volume": row["volume"],
+        "side": row["side"],
+        "timestamp": _timestamp(row["time"]),
+    }
+
+
+def quote_message(row) -> dict:
+    return {
+        "type": "quote",
+        "symbol": row["symbol"],
+        "bid_price": row["bid_price"],
+        "ask_price": row["ask_price"],
+        "bid_size": row["bid_size"],
+        "ask_size": row["ask_size"],
+        "timestamp": _timestamp(row["time"]),
+    }
+
+
+class ReplaySource:
+    """Rows of one table in (time, id) order, fetched ``prefetch`` chunks ahead"""
+
+    def __init__(
+        self,
+        db,
+        archive,
+        table: str,
+        to_message: Callable[[object], dict],
+        symbols: List[str],
+        start: datetime,
+        end: datetime,
+        chunk_size: int,
+        prefetch: int,
+    ):
+        self.db = db
+        self.archive = archive
+        self.table = table
+        self.query = f"replay_{table}"
+        self.to_message = to_message
+        self.symbols = symbols
+        self.start = start
+        self.end = end
+        self.chunk_size = chunk_size
+        self.queue: asyncio.Queue = asyncio.Queue(prefetch)
+        self.chunks = 0
+        self._task = None
+
+    def start_prefetch(self):
+        self._task = asyncio.create_task(self._fill())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _fill(self):
+        after_time, after_id = self.start, 0
+        try:
+            archived, hot_start = self.archive.split(naive_utc(self.start), naive_utc(self.end))
+            if archived:
+                while True:
+                    rows = await asyncio.to_thread(
+                        self.archive.replay_rows,
+                        self.table, self.symbols, after_time, after_id, archived[1], self.chunk_size,
+                    )
+                    if not await self._put(rows):
+                        break
+                    after_time, after_id = rows[-1]["time"], rows[-1]["id"]
+                after_time, after_id = archived[1].replace(tzinfo=timezone.utc), 0
+            if hot_start is not None:
+                while True:
+                    async with self.db.read() as conn:
+                        rows = await conn.prepared[self.query].fetch(
+                            self.symbols, after_time, after_id, self.end, self.chunk_size
+                        )
+                    if not await self._put(rows):
+                        break
+                    after_time, after_id = rows[-1]["time"], rows[-1]["id"]
+            await self.queue.put(None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Surface database errors to the consumer
+            await self.queue.put(e)
+
+    async def _put(self, rows) -> bool:
+        """Queue a chunk; False once it is the last one of its tier"""
+        self.chunks += 1
+        if rows:
+            await self.queue.put(rows)
+        return len(rows) == self.chunk_size
+
+    async def messages(self) -> AsyncIterator[Tuple[datetime, dict]]:
+        while True:
+            rows = await self.queue.get()
+            if rows is None:
+                return
+            if isinstance(rows, Exception):
+                raise rows
+            to_message = self.to_message
+            for row in rows:
+                yield row["time"], to_message(row)
+
+
+async def merged(sources: List[ReplaySource]) -> AsyncIterator[Tuple[datetime, dict]]:
+    """Time-ordered union of the sources' messages"""
+    streams = [source.messages() for source in sources]
+    heap = []
+
+    async def advance(i: int):
+        try:
+            time, message = await streams[i].__anext__()
+        except StopAsyncIteration:
+            return
+        heapq.heappush(heap, (time, i, message))
+
+    for i in range(len(streams)):
+        await advance(i)
+    while heap:
+        time, i, message = heapq.heappop(heap)
+        yield time, message
+        await advance(i)
+
+
+class ReplaySession:
+    def __init__(
+        self,
+        db,
+        archive,
+        symbols: List[str],
+        start: datetime,
+        end: datetime,
+        speed: Optional[float],
+        chunk_size: int = 2000,
+        prefetch: int = 2,
+    ):
+        self.symbols = symbols
+        self.start = start
+        self.end = end
+        self.speed = speed
+        self.sources = [
+            ReplaySource(db, archive, "quotes", quote_message, symbols, start, end, chunk_size, prefetch),
+            ReplaySource(db, archive, "trades", trade_message, symbols, start, end, chunk_size, prefetch),
+        ]
+        self.sent = 0
+
+    async def run(self, send: Callable[[str], object]):
+        """Send every message in the range through ``send``, paced by ``speed``"""
+        for source in self.sources:
+            source.start_prefetch()
+        loop = asyncio.get_running_loop()
+        first = started = None
+        try:
+            async for time, message in merged(self.sources):
+                if self.speed is not None:
+                    if first is None:
+                        first, started = time, loop.time()
+                    delay = started + (time - first).total_seconds() / self.speed - loop.time()
+                    if delay > 0.001:
+                        await asyncio.sleep(delay)
+                self.sent += 1
+                message["seq"] = self.sent
+                await send(json.dumps(message))
+                if self.sent % YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+        finally:
+            for source in self.sources:
+                await source.stop()
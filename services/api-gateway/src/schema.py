@@ -0,0 +1,32 @@
+"""
+Schema checks run at startup.
+
+The schema is owned by ``database/init.sql`` (applied by the database
+container on first boot); the gateway only verifies it instead of running
+DDL from the request process.
+"""
+REQUIRED_TABLES = ("trades", "quotes")
+REQUIRED_INDEXES = ("idx_trades_symbol_time", "idx_quotes_symbol_time")
+
+
+class SchemaError(RuntimeError):
+    pass
+
+
+async def verify_schema(conn):
+    """Raise SchemaError if init.sql has not been applied"""
+    tables = {
+        row["tablename"]
+        for row in await conn.fetch("SELECT tablename FROM pg_tables WHERE schemaname = 'public'")
+    }
+    indexes = {
+        row["indexname"]
+        for row in await conn.fetch("SELECT indexname FROM pg_indexes WHERE schemaname = 'public'")
+    }
+
+    missing = [t for t in REQUIRED_TABLES if t not in tables]
+    missing += [i for i in REQUIRED_INDEXES if i not in indexes]
+    if missing:
+        raise SchemaError(
+            f"Database schema incomplete (missing: {', '.join(missing)}); apply database/init.sql"
+        )
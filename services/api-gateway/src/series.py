@@ -0,0 +1,134 @@
+"""
+Downsampled price series for charting long ranges.
+
+The trade range is streamed from a server-side cursor into flat float arrays
+(epoch seconds and price), then reduced to exactly ``points`` points:
+
+- ``lttb``: Largest-Triangle-Three-Buckets. The first and last points are
+  kept; every bucket in between keeps the point forming the largest triangle
+  with the previously kept point and the next bucket's average. Buckets are
+  visited in order (each depends on the previous choice), but the work
+  inside a bucket and the bucket averages (prefix sums) are NumPy ops.
+- ``minmax``: the lowest and highest point of each bucket, in time order,
+  which preserves every spike.
+
+Ranges with no more than ``points`` trades are returned as is. The gateway
+refuses (400) a range holding more than ``MAX_SERIES_ROWS`` trades; both
+tiers stop reading one row past that limit, so a request cannot pull an
+unbounded range onto the event loop. Days moved
+to the Parquet archive are read through DuckDB and joined in front of the
+Postgres part. Large ranges are reduced and serialized by ``series_job`` in
+the analytics process pool (``compute.py``).
+"""
+from array import array
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .offload import json_body
+
+METHODS = ("lttb", "minmax")
+# Rows per cursor fetch
+FETCH_SIZE = 10000
+
+
+async def fetch_trades(
+    conn, symbol: str, start: datetime, end: datetime, limit: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Epoch seconds and prices of a symbol's first ``limit`` trades in [start, end), oldest first"""
+    times, prices = array("d"), array("d")
+    async with conn.transaction(readonly=True):
+        cursor = await conn.prepared["series_trades"].cursor(symbol, start, end)
+        while len(times) < limit:
+            rows = await cursor.fetch(min(FETCH_SIZE, limit - len(times)))
+            times.extend(row[0] for row in rows)
+            prices.extend(row[1] for row in rows)
+            if not rows:
+                break
+    return np.frombuffer(times), np.frombuffer(prices)
+
+
+def concat(parts: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Join (times, prices) pairs of consecutive ranges, e.g. archived then hot"""
+    if not parts:
+        return np.empty(0), np.empty(0)
+    if len(parts) == 1:
+        return parts[0]
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Indices of the ``points`` points LTTB keeps (requires 3 <= points < len(x))"""
+    n = len(x)
+    x = x - x[0]
+    # points - 2 buckets over [1, n - 1); edges[b]:edges[b + 1] is bucket b
+    edges = np.linspace(1, n - 1, points - 1).astype(np.intp)
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    counts = np.diff(edges)
+    avg_x = (cx[edges[1:]] - cx[edges[:-1]]) / counts
+    avg_y = (cy[edges[1:]] - cy[edges[:-1]]) / counts
+    # The point after the last bucket is the (always kept) last point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(points, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for b in range(points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[b]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[b] - ay))
+        a = lo + int(area.argmax())
+        selected[b + 1] = a
+    return selected
+
+
+def minmax(y: np.ndarray, points: int) -> np.ndarray:
+    """Indices of each bucket's min and max (plus the last point for odd ``points``)"""
+    n = len(y)
+    buckets = points // 2
+    span = n - 1 if points % 2 else n
+    edges = np.linspace(0, span, buckets + 1).astype(np.intp)
+    starts, ends = edges[:-1], edges[1:]
+    lows = np.minimum.reduceat(y[:span], starts)
+    highs = np.maximum.reduceat(y[:span], starts)
+    sizes = ends - starts
+    # First occurrence of each bucket's min, last occurrence of its max, so a
+    # flat bucket still yields two distinct points
+    is_low = np.flatnonzero(y[:span] == np.repeat(lows, sizes))
+    is_high = np.flatnonzero(y[:span] == np.repeat(highs, sizes))
+    low_at = is_low[np.searchsorted(is_low, starts)]
+    high_at = is_high[np.searchsorted(is_high, ends) - 1]
+    selected = np.sort(np.stack([low_at, high_at], axis=1), axis=1).ravel()
+    if points % 2:
+        selected = np.append(selected, n - 1)
+    return selected
+
+
+def downsample(times: np.ndarray, prices: np.ndarray, points: int, method: str) -> np.ndarray:
+    """Indices of the points to keep, in time order"""
+    if len(times) <= points:
+        return np.arange(len(times))
+    if method == "minmax":
+        return minmax(prices, points)
+    return lttb(times, prices, points)
+
+
+def series_job(arrays: Dict[str, np.ndarray], symbol: str, points: int, method: str) -> bytes:
+    """Analytics pool job: the /api/series response body"""
+    return json_body(to_payload(symbol, arrays["time"], arrays["price"], points, method))
+
+
+def to_payload(symbol: str, times: np.ndarray, prices: np.ndarray, points: int, method: str) -> dict:
+    keep = downsample(times, prices, points, method)
+    return {
+        "symbol": symbol,
+        "method": method,
+        "source_points": len(times),
+        "points": len(keep),
+        # Epoch milliseconds
+        "time": np.rint(times[keep] * 1000).astype(np.int64).tolist(),
+        "price": prices[keep].tolist(),
+    }
@@ -0,0 +1,68 @@
+"""
+Shared counter surface across gateway workers.
+
+Each worker periodically adds its counter deltas to one Redis hash and
+publishes its gauges under a per-worker key that expires if the worker
+dies. ``snapshot()`` reads the cluster-wide view from any worker.
+"""
+from typing import Callable, Dict
+import asyncio
+
+TOTALS_KEY = "gateway:stats"
+WORKER_KEY_PREFIX = "gateway:worker:"
+
+
+class ClusterStats:
+    def __init__(self, redis_client, worker: str, interval: float = 2.0):
+        self.redis = redis_client
+        self.worker = worker
+        self.interval = interval
+        # name -> callable returning the current cumulative value
+        self.counters: Dict[str, Callable[[], int]] = {}
+        # name -> callable returning the current point-in-time value
+        self.gauges: Dict[str, Callable[[], object]] = {}
+        self._flushed: Dict[str, int] = {}
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        await self.redis.delete(WORKER_KEY_PREFIX + self.worker)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Stats flush failed: {e}")
+
+    async def flush(self):
+        pipe = self.redis.pipeline(transaction=False)
+        for name, read in self.counters.items():
+            value = read()
+            delta = value - self._flushed.get(name, 0)
+            if delta:
+                pipe.hincrby(TOTALS_KEY, name, delta)
+            self._flushed[name] = value
+
+        worker_key = WORKER_KEY_PREFIX + self.worker
+        pipe.hset(worker_key, mapping={name: str(read()) for name, read in self.gauges.items()})
+        pipe.expire(worker_key, int(self.interval * 3) + 1)
+        await pipe.execute()
+
+    async def snapshot(self) -> dict:
+        totals = {k.decode(): int(v) for k, v in (await self.redis.hgetall(TOTALS_KEY)).items()}
+        workers = {}
+        async for key in self.redis.scan_iter(match=WORKER_KEY_PREFIX + "*"):
+            fields = await self.redis.hgetall(key)
+            workers[key.decode()[len(WORKER_KEY_PREFIX):]] = {k.decode(): v.decode() for k, v in fields.items()}
+        return {"totals": totals, "workers": workers}
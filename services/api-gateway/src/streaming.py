@@ -0,0 +1,84 @@
+"""
+Per-client WebSocket sender: optional rate limiting (conflation) and
+delta-encoded frames.
+
+Delta frames always carry ``type``; ``symbol`` is implied by the connection
+and every other field is only present when it changed since the previous
+frame of that type sent to this client. The first frame of each type (and
+the quote/trade/indicators inside a snapshot) is the baseline.
+"""
+from typing import Dict, List, Optional
+import asyncio
+import json
+
+from fastapi import WebSocket
+
+from .hub import FanoutHub, Subscription
+
+_COMPACT = (",", ":")
+
+
+class DeltaEncoder:
+    __slots__ = ("last",)
+
+    def __init__(self):
+        self.last: Dict[str, dict] = {}
+
+    def encode(self, message: dict) -> str:
+        kind = message["type"]
+        previous = self.last.get(kind)
+        self.last[kind] = message
+        if previous is None:
+            frame = {k: v for k, v in message.items() if k != "symbol"}
+        else:
+            frame = {"type": kind}
+            for key, value in message.items():
+                if key != "symbol" and key != "type" and previous.get(key) != value:
+                    frame[key] = value
+        return json.dumps(frame, separators=_COMPACT)
+
+    def encode_text(self, text: str) -> str:
+        """Encode a backlog frame; snapshots pass through and become the baseline"""
+        message = json.loads(text)
+        if message["type"] == "snapshot":
+            for kind in ("quote", "trade", "indicators"):
+                if message.get(kind):
+                    self.last[kind] = message[kind]
+            return text
+        return self.encode(message)
+
+
+async def pump(
+    websocket: WebSocket,
+    subscription: Subscription,
+    backlog: List[str],
+    hub: FanoutHub,
+    encoder: Optional[DeltaEncoder] = None,
+    min_interval: Optional[float] = None
+):
+    """Send the backlog, then live messages until cancelled"""
+    sent_counter = subscription.sent_counter
+    for text in backlog:
+        await websocket.send_text(encoder.encode_text(text) if encoder else text)
+    hub.sent += len(backlog)
+    subscription.sent += len(backlog)
+    sent_counter.inc(len(backlog))
+
+    if subscription.conflate:
+        # At most one frame per message type every min_interval seconds
+        while True:
+            await subscription.ready.wait()
+            for text, message in subscription.take_pending():
+                await websocket.send_text(encoder.encode(message) if encoder else text)
+                hub.sent += 1
+                subscription.sent += 1
+                sent_counter.inc()
+            await asyncio.sleep(min_interval)
+
+    queue = subscription.queue
+    while True:
+        text, message = await queue.get()
+        await websocket.send_text(encoder.encode(message) if encoder else text)
+        hub.sent += 1
+        subscription.sent += 1
+        sent_counter.inc()
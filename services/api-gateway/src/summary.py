@@ -0,0 +1,145 @@
+"""
+Universe-wide market summary, published on the ``summary`` hub channel.
+
+Overview dashboards need one row per symbol (last price, change since the
+day's first trade, bid/ask, volume and trade count), not every tick. Each
+worker keeps those rows current from the feed in O(1) per message and, every
+``interval`` seconds, publishes one frame with the rows of the symbols that
+changed since the previous frame:
+
+    {"type": "summary", "fields": ["last", ...], "symbols": {"AAPL": [189.5, ...]}, ...}
+
+Rows are positional lists in ``FIELDS`` order, which keeps a frame for
+thousands of symbols small. A full snapshot (every symbol) starts each
+WebSocket and is served by ``/api/summary``; later frames apply on top of it.
+
+Volume, trade count and the change baseline reset at midnight UTC. Warm
+start seeds them from the day's trades in the database.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Set
+import asyncio
+
+from .cache import MarketCache
+
+CHANNEL = "summary"
+FIELDS = ("last", "change", "change_pct", "bid", "ask", "volume", "trades")
+
+
+class SymbolSummary:
+    __slots__ = ("day", "open", "last", "bid", "ask", "volume", "trades")
+
+    def __init__(self):
+        self.day: Optional[str] = None
+        self.open: Optional[float] = None
+        self.last: Optional[float] = None
+        self.bid: Optional[float] = None
+        self.ask: Optional[float] = None
+        self.volume = 0
+        self.trades = 0
+
+    def trade(self, price: float, volume: int, timestamp: str):
+        # Feed timestamps are naive UTC ISO strings, so the date is a prefix
+        day = timestamp[:10]
+        if day != self.day:
+            self.day = day
+            self.open = price
+            self.volume = 0
+            self.trades = 0
+        self.last = price
+        self.volume += volume
+        self.trades += 1
+
+    def row(self) -> list:
+        change = change_pct = None
+        if self.last is not None and self.open:
+            change = round(self.last - self.open, 4)
+            change_pct = round(100.0 * change / self.open, 3)
+        return [self.last, change, change_pct, self.bid, self.ask, self.volume, self.trades]
+
+
+class SummaryEngine:
+    """Hub listener folding trades and quotes into per-symbol summary rows"""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.symbols: Dict[str, SymbolSummary] = {}
+        self.changed: Set[str] = set()
+        self.frames = 0
+        self.timestamp: Optional[str] = None
+        # Called with (channel key, frame) once per interval, e.g. hub.publish
+        self.publish: Optional[Callable[[str, dict], None]] = None
+        self._task = None
+
+    def state(self, symbol: str) -> SymbolSummary:
+        state = self.symbols.get(symbol)
+        if state is None:
+            state = self.symbols[symbol] = SymbolSummary()
+        return state
+
+    def observe(self, message: dict):
+        kind = message["type"]
+        if kind == "trade":
+            self.state(message["symbol"]).trade(message["price"], message["volume"], message["timestamp"])
+        elif kind == "quote":
+            state = self.state(message["symbol"])
+            state.bid = message["bid_price"]
+            state.ask = message["ask_price"]
+        else:
+            return
+        self.changed.add(message["symbol"])
+
+    def warm(self, day: str, rows: Iterable, cache: MarketCache):
+        """Seed from ``day_summary`` rows (today's trades) and the cache's latest ticks"""
+        for row in rows:
+            state = self.state(row["symbol"])
+            state.day = day
+            state.open = row["open"]
+            state.volume = row["volume"]
+            state.trades = row["trades"]
+        for symbol, cached in cache.symbols.items():
+            state = self.state(symbol)
+            if cached.last_trade is not None:
+                state.last = cached.last_trade["price"]
+            if cached.last_quote is not None:
+                state.bid = cached.last_quote["bid_price"]
+                state.ask = cached.last_quote["ask_price"]
+
+    def frame(self, symbols: Iterable[str], kind: str = "summary") -> dict:
+        return {
+            "type": kind,
+            "channel": CHANNEL,
+            "fields": FIELDS,
+            "symbols": {symbol: self.symbols[symbol].row() for symbol in symbols},
+            "timestamp": self.timestamp,
+        }
+
+    def snapshot(self) -> dict:
+        """Every symbol seen so far"""
+        return self.frame(sorted(self.symbols), "snapshot")
+
+    def flush(self):
+        """Publish the symbols that changed since the last frame, if any"""
+        self.timestamp = datetime.utcnow().isoformat()
+        if not self.changed:
+            return
+        changed, self.changed = self.changed, set()
+        self.frames += 1
+        if self.publish is not None:
+            self.publish(CHANNEL, self.frame(sorted(changed)))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
@@ -0,0 +1,430 @@
+// Feeds are connected and parsed in a Web Worker (feed-worker.js), which
+// posts one coalesced batch per ~16 ms; the page merges batches and draws at
+// most once per animation frame
+const feedWorker = new Worker(document.currentScript.dataset.worker);
+const WS_BASE = `${location.protocol === 'https:' ? 'wss' : 'ws'}://${location.host || 'localhost:8000'}`;
+let feedsLive = false;
+let totalMessages = 0;
+let totalVolume = 0;
+let messagesPerSecond = 0;
+let lastSecondTotal = 0;
+let startTime = Date.now();
+
+// Decorative effects (matrix rain, CSS animations) pause above this rate or
+// when frames keep running long
+const BUSY_MESSAGES_PER_SEC = 200;
+const LONG_FRAME_MS = 8;
+let underLoad = false;
+let longFrames = 0;
+
+// Symbol universe from /api/universe: symbol -> instrument metadata
+let universe = {};
+
+// Feeds shown and streamed: the first WATCHLIST_SIZE symbols of the universe,
+// plus any symbol picked from the selector
+const WATCHLIST_SIZE = 5;
+
+// Stock data storage (watchlist symbols only)
+const stockData = {};
+// symbol -> { price, change, percent } cells of its row in the stock list
+let stockRows = {};
+const changedStocks = new Set();
+
+function addToWatchlist(symbol) {
+    if (stockData[symbol]) {
+        return false;
+    }
+    const instrument = universe[symbol] || { name: symbol };
+    stockData[symbol] = { symbol: symbol, name: instrument.name, price: 0, change: 0, bid: 0, ask: 0 };
+    return true;
+}
+
+async function loadUniverse() {
+    try {
+        const response = await fetch('/api/universe');
+        const instruments = await response.json();
+        universe = {};
+        instruments.forEach(instrument => { universe[instrument.symbol] = instrument; });
+        
+        const select = document.getElementById('symbolSelect');
+        const options = document.createDocumentFragment();
+        instruments.forEach(instrument => {
+            const option = document.createElement('option');
+            option.value = instrument.symbol;
+            option.textContent = `⟨ ${instrument.symbol} ⟩ ${instrument.name}`;
+            options.appendChild(option);
+        });
+        select.replaceChildren(options);
+        
+        instruments.slice(0, WATCHLIST_SIZE).forEach(instrument => addToWatchlist(instrument.symbol));
+        logConsole(`Loaded universe of ${instruments.length.toLocaleString()} symbols`, 'system');
+    } catch (error) {
+        logConsole(`Failed to load symbol universe: ${error.message}`, 'error');
+    }
+}
+
+// Picking a symbol adds it to the watchlist (and streams it if feeds are live)
+function selectSymbol(symbol) {
+    if (!addToWatchlist(symbol)) {
+        return;
+    }
+    updateStockDisplay();
+    if (feedsLive) {
+        connectWebSocket();
+    }
+}
+
+// Konami Code Detection
+let konamiCode = [];
+const konamiSequence = ['ArrowUp', 'ArrowUp', 'ArrowDown', 'ArrowDown', 'ArrowLeft', 'ArrowRight', 'ArrowLeft', 'ArrowRight', 'KeyB', 'KeyA'];
+
+const MATRIX_INTERVAL_MS = 50;
+
+// Initialize Matrix Rain Effect
+function initializeMatrix() {
+    const canvas = document.getElementById('matrixCanvas');
+    const ctx = canvas.getContext('2d');
+    
+    canvas.width = window.innerWidth;
+    canvas.height = window.innerHeight;
+    
+    const chars = '01アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲン$€£¥₿📈📉💹💱';
+    const charArray = chars.split('');
+    const fontSize = 14;
+    const columns = canvas.width / fontSize;
+    const drops = Array(Math.floor(columns)).fill(1);
+    let lastDraw = 0;
+    
+    // Driven by requestAnimationFrame (so it stops in background tabs) at
+    // ~20 fps, and skipped entirely while the feed is under load
+    function drawMatrix(now) {
+        requestAnimationFrame(drawMatrix);
+        if (underLoad || now - lastDraw < MATRIX_INTERVAL_MS) {
+            return;
+        }
+        lastDraw = now;
+        ctx.fillStyle = 'rgba(0, 0, 0, 0.05)';
+        ctx.fillRect(0, 0, canvas.width, canvas.height);
+        
+        ctx.fillStyle = '#00ff41';
+        ctx.font = fontSize + 'px monospace';
+        
+        for (let i = 0; i < drops.length; i++) {
+            const text = charArray[Math.floor(Math.random() * charArray.length)];
+            ctx.fillText(text, i * fontSize, drops[i] * fontSize);
+            
+            if (drops[i] * fontSize > canvas.height && Math.random() > 0.975) {
+                drops[i] = 0;
+            }
+            drops[i]++;
+        }
+    }
+    
+    requestAnimationFrame(drawMatrix);
+}
+
+// Console: a ring of the last CONSOLE_LINES entries drawn into a fixed set of
+// recycled rows. A new line refills the oldest row and moves it to the
+// bottom, so logging never creates or removes DOM nodes.
+const CONSOLE_LINES = 100;
+const LINE_STYLES = {
+    system: ['system-msg', '[SYSTEM]'],
+    trade: ['trade-msg', '[TRADE]'],
+    quote: ['quote-msg', '[QUOTE]'],
+    error: ['error-msg', '[ERROR]'],
+    success: ['system-msg', '[SUCCESS]'],
+};
+
+const consoleView = {
+    entries: new Array(CONSOLE_LINES),
+    pushed: 0,   // entries ever pushed
+    drawn: 0,    // entries drawn so far
+    rows: [],
+    nextRow: 0,
+    
+    init() {
+        const element = document.getElementById('console');
+        for (let i = 0; i < CONSOLE_LINES; i++) {
+            const line = document.createElement('div');
+            line.className = 'console-line';
+            line.hidden = true;
+            const time = line.appendChild(document.createElement('span'));
+            time.className = 'timestamp';
+            const kind = line.appendChild(document.createElement('span'));
+            const text = line.appendChild(document.createTextNode(''));
+            element.appendChild(line);
+            this.rows.push({ line, time, kind, text });
+        }
+    },
+    
+    push(time, type, message) {
+        this.entries[this.pushed % CONSOLE_LINES] = [time, type, message];
+        this.pushed++;
+        scheduleRender();
+    },
+    
+    render() {
+        const element = document.getElementById('console');
+        // Lines pushed and overwritten within one frame were never visible
+        const first = Math.max(this.drawn, this.pushed - CONSOLE_LINES);
+        for (let i = first; i < this.pushed; i++) {
+            const [time, type, message] = this.entries[i % CONSOLE_LINES];
+            const [typeClass, prefix] = LINE_STYLES[type] || LINE_STYLES.system;
+            const row = this.rows[this.nextRow];
+            this.nextRow = (this.nextRow + 1) % CONSOLE_LINES;
+            row.time.textContent = `[${new Date(time).toLocaleTimeString()}]`;
+            row.kind.className = typeClass;
+            row.kind.textContent = prefix;
+            row.text.data = ` ${message}`;
+            row.line.hidden = false;
+            element.appendChild(row.line);
+        }
+        if (this.pushed > this.drawn) {
+            element.scrollTop = element.scrollHeight;
+        }
+        this.drawn = this.pushed;
+    },
+    
+    clear() {
+        this.rows.forEach(row => { row.line.hidden = true; });
+        this.drawn = this.pushed;
+    },
+};
+
+// Console Logging
+function logConsole(message, type = 'system') {
+    consoleView.push(Date.now(), type, message);
+}
+
+// Render loop: at most one DOM update per animation frame
+let renderScheduled = false;
+
+function scheduleRender() {
+    if (!renderScheduled) {
+        renderScheduled = true;
+        requestAnimationFrame(render);
+    }
+}
+
+function render() {
+    renderScheduled = false;
+    const started = performance.now();
+    renderStocks();
+    consoleView.render();
+    document.getElementById('totalMessages').textContent = totalMessages.toLocaleString();
+    document.getElementById('totalVolume').textContent = totalVolume.toLocaleString();
+    if (performance.now() - started > LONG_FRAME_MS) {
+        longFrames++;
+    }
+}
+
+function applyBatch(batch) {
+    Object.entries(batch.symbols).forEach(([symbol, update]) => {
+        const stock = stockData[symbol];
+        if (stock) {
+            Object.assign(stock, update);
+            changedStocks.add(symbol);
+        }
+    });
+    if (batch.skipped) {
+        logConsole(`… ${batch.skipped.toLocaleString()} lines skipped`, 'system');
+    }
+    batch.lines.forEach(([time, type, message]) => consoleView.push(time, type, message));
+    totalMessages += batch.messages;
+    totalVolume += batch.volume;
+    scheduleRender();
+}
+
+feedWorker.onmessage = event => applyBatch(event.data);
+consoleView.init();
+
+// WebSocket Connection (the sockets live in the feed worker)
+function connectWebSocket() {
+    logConsole('Initiating connection to ALL market feeds...', 'system');
+    feedWorker.postMessage({ type: 'connect', symbols: Object.keys(stockData), base: WS_BASE });
+    feedsLive = true;
+    
+    document.getElementById('connectionStatus').textContent = 'ALL CONNECTED';
+    document.getElementById('connectionStatus').style.color = '#00ff41';
+}
+
+function disconnectWebSocket() {
+    feedWorker.postMessage({ type: 'disconnect' });
+    feedsLive = false;
+    logConsole('Disconnecting from all market feeds...', 'system');
+    document.getElementById('connectionStatus').textContent = 'OFFLINE';
+    document.getElementById('connectionStatus').style.color = '#ff4444';
+}
+
+// Rebuild the stock list rows (only when the watchlist changes)
+function updateStockDisplay() {
+    const stockList = document.getElementById('stockList');
+    const rows = document.createDocumentFragment();
+    stockRows = {};
+    
+    Object.values(stockData).forEach(stock => {
+        const stockElement = document.createElement('div');
+        stockElement.className = 'stock-item';
+        stockElement.innerHTML = `
+            <div class="stock-symbol"></div>
+            <div class="stock-name"></div>
+            <div class="stock-price"></div>
+            <div class="stock-change"></div>
+            <div class="stock-change"></div>
+        `;
+        const [symbolCell, nameCell, price, change, percent] = stockElement.children;
+        symbolCell.textContent = stock.symbol;
+        nameCell.textContent = stock.name;
+        stockRows[stock.symbol] = { price, change, percent };
+        changedStocks.add(stock.symbol);
+        rows.appendChild(stockElement);
+    });
+    
+    stockList.replaceChildren(rows);
+    renderStocks();
+}
+
+// Refresh the cells of symbols updated since the last frame
+function renderStocks() {
+    changedStocks.forEach(symbol => {
+        const stock = stockData[symbol];
+        const row = stockRows[symbol];
+        if (!stock || !row) {
+            return;
+        }
+        const changeClass = stock.change >= 0 ? 'stock-change positive' : 'stock-change negative';
+        const changeSymbol = stock.change >= 0 ? '+' : '';
+        const changePercent = stock.price > 0 ? (stock.change / stock.price * 100).toFixed(2) : '0.00';
+        row.price.textContent = `$${stock.price.toFixed(2)}`;
+        row.change.textContent = `${changeSymbol}${stock.change.toFixed(2)}`;
+        row.percent.textContent = `${changeSymbol}${changePercent}%`;
+        row.change.className = changeClass;
+        row.percent.className = changeClass;
+    });
+    changedStocks.clear();
+}
+
+function updateConnectionStatus(connected) {
+    const wsStatus = document.getElementById('wsStatus');
+    const wsText = document.getElementById('wsText');
+    
+    if (connected) {
+        wsStatus.classList.remove('offline');
+        wsText.textContent = 'CONNECTED';
+    } else {
+        wsStatus.classList.add('offline');
+        wsText.textContent = 'OFFLINE';
+    }
+}
+
+// Once a second: rate, uptime and whether decorations should pause
+function updateStats() {
+    messagesPerSecond = totalMessages - lastSecondTotal;
+    lastSecondTotal = totalMessages;
+    document.getElementById('messagesPerSec').textContent = messagesPerSecond;
+    
+    setUnderLoad(messagesPerSecond >= BUSY_MESSAGES_PER_SEC || longFrames > 2);
+    longFrames = 0;
+    
+    // Update uptime
+    const uptimeSeconds = Math.floor((Date.now() - startTime) / 1000);
+    const hours = Math.floor(uptimeSeconds / 3600);
+    const minutes = Math.floor((uptimeSeconds % 3600) / 60);
+    const seconds = uptimeSeconds % 60;
+    document.getElementById('uptime').textContent = 
+        `${hours.toString().padStart(2, '0')}:${minutes.toString().padStart(2, '0')}:${seconds.toString().padStart(2, '0')}`;
+}
+
+function setUnderLoad(busy) {
+    if (busy !== underLoad) {
+        underLoad = busy;
+        document.body.classList.toggle('under-load', busy);
+    }
+}
+
+function clearConsole() {
+    consoleView.clear();
+    logConsole('Console cleared', 'system');
+}
+
+function showEasterEgg() {
+    document.getElementById('easterEgg').style.display = 'block';
+    logConsole('🥚 Easter egg activated! Achievement unlocked: Matrix Trader', 'success');
+}
+
+function hideEasterEgg() {
+    document.getElementById('easterEgg').style.display = 'none';
+}
+
+// Check API Status
+async function checkAPIStatus() {
+    try {
+        const response = await fetch('http://localhost:8000/health');
+        if (response.ok) {
+            document.getElementById('apiStatus').classList.remove('offline');
+            document.getElementById('apiText').textContent = 'ONLINE';
+            document.getElementById('redisStatus').classList.remove('offline');
+            document.getElementById('redisText').textContent = 'CONNECTED';
+            return true;
+        }
+    } catch (error) {
+        document.getElementById('apiStatus').classList.add('offline');
+        document.getElementById('apiText').textContent = 'OFFLINE';
+        document.getElementById('redisStatus').classList.add('offline');
+        document.getElementById('redisText').textContent = 'ERROR';
+        logConsole('API health check failed. Make sure services are running.', 'error');
+        return false;
+    }
+}
+
+// Konami Code Detection
+document.addEventListener('keydown', (e) => {
+    konamiCode.push(e.code);
+    if (konamiCode.length > konamiSequence.length) {
+        konamiCode.shift();
+    }
+    
+    if (konamiCode.join(',') === konamiSequence.join(',')) {
+        showEasterEgg();
+        konamiCode = [];
+        // Add special effect
+        document.body.style.animation = 'glitch 0.5s';
+        setTimeout(() => {
+            document.body.style.animation = '';
+        }, 500);
+    }
+});
+
+// Initialize on load
+window.addEventListener('load', async () => {
+    initializeMatrix();
+    logConsole('Market Data Pipeline Terminal  initializing...', 'system');
+    logConsole('Checking system components...', 'system');
+    
+    // Check API status
+    const apiOnline = await checkAPIStatus();
+    
+    if (apiOnline) {
+        logConsole('✓ All systems operational', 'success');
+        logConsole('Ready to connect to market feed', 'system');
+    } else {
+        logConsole('⚠ API offline. Run: docker-compose up -d', 'error');
+    }
+    
+    // Load the symbol universe, then initialize stock display
+    await loadUniverse();
+    updateStockDisplay();
+    
+    // Update stats every second
+    setInterval(updateStats, 1000);
+    
+    // Periodic API health check
+    setInterval(checkAPIStatus, 30000);
+});
+
+// Handle window resize
+window.addEventListener('resize', () => {
+    const canvas = document.getElementById('matrixCanvas');
+    canvas.width = window.innerWidth;
+    canvas.height = window.innerHeight;
+});
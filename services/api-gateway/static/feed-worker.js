@@ -0,0 +1,148 @@
+// Feed worker: owns the WebSocket connections so parsing never runs on the
+// page's main thread. Messages are folded into per-symbol state as they
+// arrive and posted to the page as one batch per FLUSH_MS:
+//   { symbols: { AAPL: { price, change, bid, ask } }, lines, skipped, messages, volume }
+// Only the last CONSOLE_LINES lines of a batch are formatted and sent; the
+// console could not show the rest anyway.
+
+const FLUSH_MS = 16;
+const CONSOLE_LINES = 100;
+
+let sockets = {};
+let feedPositions = {};  // symbol -> { seq, epoch } of the last message seen
+const state = {};        // symbol -> { price, change, bid, ask }
+
+// Pending batch
+let changed = new Set();
+let pending = [];        // [time, kind, symbol, data or text]
+let skipped = 0;
+let messages = 0;
+let volume = 0;
+let flushTimer = null;
+
+function scheduleFlush() {
+    if (flushTimer === null) {
+        flushTimer = setTimeout(flush, FLUSH_MS);
+    }
+}
+
+function log(kind, text) {
+    pending.push([Date.now(), kind, null, text]);
+    trimPending();
+    scheduleFlush();
+}
+
+function trimPending() {
+    if (pending.length > 2 * CONSOLE_LINES) {
+        skipped += pending.length - CONSOLE_LINES;
+        pending = pending.slice(-CONSOLE_LINES);
+    }
+}
+
+function describe(symbol, data) {
+    if (data.type === 'quote') {
+        return `Quote ${symbol}: Bid $${data.bid_price.toFixed(2)} | Ask $${data.ask_price.toFixed(2)} | Spread $${(data.ask_price - data.bid_price).toFixed(2)}`;
+    }
+    const arrow = data.side === 'BUY' ? '↑' : '↓';
+    const color = data.side === 'BUY' ? '🟢' : '🔴';
+    return `${color} Trade ${symbol}: ${data.side} ${data.volume} @ $${data.price.toFixed(2)} ${arrow}`;
+}
+
+function flush() {
+    flushTimer = null;
+    if (pending.length > CONSOLE_LINES) {
+        skipped += pending.length - CONSOLE_LINES;
+        pending = pending.slice(-CONSOLE_LINES);
+    }
+    const symbols = {};
+    changed.forEach(symbol => { symbols[symbol] = state[symbol]; });
+    const lines = pending.map(([time, kind, symbol, payload]) =>
+        [time, kind, symbol === null ? payload : describe(symbol, payload)]
+    );
+    postMessage({ symbols, lines, skipped, messages, volume });
+    changed = new Set();
+    pending = [];
+    skipped = 0;
+    messages = 0;
+    volume = 0;
+}
+
+function apply(symbol, data) {
+    const stock = state[symbol] || (state[symbol] = { price: 0, change: 0, bid: 0, ask: 0 });
+    if (data.type === 'snapshot') {
+        feedPositions[symbol] = { seq: data.seq, epoch: data.epoch };
+        if (data.quote) {
+            stock.bid = data.quote.bid_price;
+            stock.ask = data.quote.ask_price;
+        }
+        if (data.trade) {
+            stock.price = data.trade.price;
+        }
+        pending.push([Date.now(), 'system', null, `Snapshot ${symbol} @ seq ${data.seq}`]);
+    } else {
+        if (data.seq !== undefined && feedPositions[symbol]) {
+            feedPositions[symbol].seq = data.seq;
+        }
+        if (data.type === 'quote') {
+            stock.bid = data.bid_price;
+            stock.ask = data.ask_price;
+        } else if (data.type === 'trade') {
+            const oldPrice = stock.price || data.price;
+            stock.price = data.price;
+            stock.change = data.price - oldPrice;
+            volume += data.volume;
+        } else {
+            return;
+        }
+        pending.push([Date.now(), data.type, symbol, data]);
+    }
+    changed.add(symbol);
+    messages++;
+    trimPending();
+    scheduleFlush();
+}
+
+function connect(symbols, base) {
+    symbols.forEach(symbol => {
+        if (sockets[symbol] && sockets[symbol].readyState === WebSocket.OPEN) {
+            return;
+        }
+        try {
+            // Resume from the last seen sequence so missed ticks are replayed
+            const resume = feedPositions[symbol];
+            const query = resume ? `?last_seq=${resume.seq}&epoch=${resume.epoch}` : '';
+            const socket = new WebSocket(`${base}/ws/${symbol}${query}`);
+            socket.onopen = () => log('success', `✓ Connected to ${symbol} feed`);
+            socket.onmessage = event => {
+                try {
+                    apply(symbol, JSON.parse(event.data));
+                } catch (e) {
+                    log('error', `Parse error for ${symbol}: ${e.message}`);
+                }
+            };
+            socket.onerror = () => log('error', `WebSocket error for ${symbol}`);
+            socket.onclose = () => log('system', `${symbol} connection closed`);
+            sockets[symbol] = socket;
+        } catch (error) {
+            log('error', `Failed to connect ${symbol}: ${error.message}`);
+        }
+    });
+}
+
+function disconnect() {
+    Object.values(sockets).forEach(socket => {
+        if (socket.readyState === WebSocket.OPEN) {
+            socket.close();
+        }
+    });
+    sockets = {};
+}
+
+onmessage = event => {
+    const command = event.data;
+    if (command.type === 'connect') {
+        connect(command.symbols, command.base);
+    } else if (command.type === 'disconnect') {
+        disconnect();
+    }
+};
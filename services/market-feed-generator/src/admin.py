@@ -0,0 +1,81 @@
+"""
+Admin HTTP endpoints for the generator (profiling and loop lag).
+
+The generator has no web framework, so this is a small stdlib server on its
+own thread, mirroring the gateway's /admin routes. Every request must carry
+``X-Admin-Token`` matching ``ADMIN_TOKEN``; without a token configured the
+server is never started.
+"""
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import json
+import secrets
+import threading
+
+from profiling import LoopLagMonitor, SamplingProfiler
+
+
+class AdminHandler(BaseHTTPRequestHandler):
+    # Set on the subclass built by start_admin_server
+    token = ""
+    profiler: SamplingProfiler = None
+    loop_monitor: LoopLagMonitor = None
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def _route(self, method: str):
+        supplied = self.headers.get("X-Admin-Token") or ""
+        if not secrets.compare_digest(supplied, self.token):
+            return self._json(403, {"detail": "Invalid admin token"})
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        route = (method, url.path)
+        try:
+            if route == ("POST", "/admin/profile/start"):
+                if self.profiler.running:
+                    return self._json(409, {"detail": "Profiler already running"})
+                interval = min(max(float(query.get("interval", 0.005)), 0.001), 1.0)
+                max_seconds = min(max(float(query.get("max_seconds", 300)), 1.0), 3600.0)
+                self.profiler.start(interval, max_seconds)
+                return self._json(200, self.profiler.status())
+            if route == ("POST", "/admin/profile/stop"):
+                folded = self.profiler.stop().encode()
+                filename = f"generator-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.folded"
+                return self._send(200, folded, "text/plain; charset=utf-8", filename)
+            if route == ("GET", "/admin/profile"):
+                return self._json(200, self.profiler.status())
+            if route == ("GET", "/admin/loop-lag"):
+                return self._json(200, self.loop_monitor.status())
+        except ValueError as e:
+            return self._json(422, {"detail": str(e)})
+        self._json(404, {"detail": "Not Found"})
+
+    def _json(self, status: int, body: dict):
+        self._send(status, json.dumps(body).encode(), "application/json")
+
+    def _send(self, status: int, body: bytes, content_type: str, filename: str = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if filename:
+            self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_admin_server(port: int, token: str, profiler: SamplingProfiler, loop_monitor: LoopLagMonitor):
+    handler = type("BoundAdminHandler", (AdminHandler,), {
+        "token": token, "profiler": profiler, "loop_monitor": loop_monitor,
+    })
+    server = ThreadingHTTPServer(("0.0.0.0", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="admin-http", daemon=True).start()
+    return server
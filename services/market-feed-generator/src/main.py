@@ -5,35 +5,77 @@ from datetime import datetime
 import redis.asyncio as redis
 import signal
 import sys
+import os
+import uuid
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from admin import start_admin_server
+from orderbook import SimulatedBook
+from profiling import LoopLagMonitor, SamplingProfiler
+from scenarios import ScenarioClock, scenario_from_env
+from shocks import shocks_from_env
+from universe import SymbolRegistry, load_registry
+
+# Pre-bound children so publishing only pays for one inc()
+MESSAGES_PUBLISHED = Counter(
+    "generator_messages_published_total", "Feed messages published to Redis", ["type"]
+)
+QUOTES_PUBLISHED = MESSAGES_PUBLISHED.labels("quote")
+TRADES_PUBLISHED = MESSAGES_PUBLISHED.labels("trade")
+BOOKS_PUBLISHED = MESSAGES_PUBLISHED.labels("book")
+PUBLISHED_BY_TYPE = {"quote": QUOTES_PUBLISHED, "trade": TRADES_PUBLISHED, "book": BOOKS_PUBLISHED}
+EVENT_LOOP_LAG = Histogram(
+    "generator_event_loop_lag_seconds", "Event-loop scheduling delay of a periodic heartbeat",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+SCENARIO_RATE = Gauge(
+    "generator_scenario_rate", "Publish rate multiplier of the busiest symbol in the current sweep"
+)
 
 class MarketDataGenerator:
-    def __init__(self):
+    def __init__(self, registry: SymbolRegistry = None):
         self.redis_client = None
         self.running = True
-        self.symbols = ["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA"]
-        
-        # Starting prices for each symbol
-        self.base_prices = {
-            "AAPL": 175.0,
-            "GOOGL": 140.0,
-            "MSFT": 380.0,
-            "AMZN": 170.0,
-            "TSLA": 240.0
-        }
+        
+        # Instruments and their metadata come from the symbol registry (SYMBOLS_FILE)
+        self.registry = registry or load_registry(os.getenv("SYMBOLS_FILE", ""))
+        self.symbols = list(self.registry.symbols)
+        self.instruments = self.registry.instruments
+        
+        # Per-symbol publish sequence, scoped to this generator instance
+        self.source = uuid.uuid4().hex[:8]
+        self.sequences = {symbol: 0 for symbol in self.symbols}
+        
+        # Current prices, starting from each instrument's start price
+        self.base_prices = {i.symbol: i.start_price for i in self.registry}
         
         # Volatility for each symbol (affects price movement)
-        self.volatility = {
-            "AAPL": 0.002,
-            "GOOGL": 0.003,
-            "MSFT": 0.002,
-            "AMZN": 0.003,
-            "TSLA": 0.005  # Tesla is more volatile
-        }
+        self.volatility = {i.symbol: i.volatility for i in self.registry}
+        
+        # Timeline of rate and volatility regimes, halts and bursts (SCENARIO_FILE);
+        # a seeded scenario makes every draw below reproducible
+        self.scenario = scenario_from_env(self.symbols)
+        if self.scenario.seed is not None:
+            random.seed(self.scenario.seed)
+        self.clock = ScenarioClock(self.scenario, self.symbols)
+        self.frame = self.clock.frame()
+        
+        # Optional cross-symbol correlation of the random walks (None: independent)
+        self.shocks = shocks_from_env(self.symbols, self.scenario.seed)
+        
+        # Rounding grid per symbol: (tick size, decimals)
+        self.ticks = {i.symbol: (i.tick_size, i.decimals) for i in self.registry}
+        
+        # Simulated L2 books (BOOK_LEVELS per side, 0 disables), published on book:{symbol}
+        # as level updates with a full snapshot every BOOK_SNAPSHOT_INTERVAL updates
+        book_levels = int(os.getenv("BOOK_LEVELS", "10"))
+        self.book_snapshot_interval = int(os.getenv("BOOK_SNAPSHOT_INTERVAL", "50"))
+        self.books = {i.symbol: SimulatedBook(i, book_levels) for i in self.registry} if book_levels > 0 else {}
         
     async def connect(self):
         """Connect to Redis"""
         try:
-            self.redis_client = await redis.from_url("redis://redis:6379")
+            self.redis_client = await redis.from_url(os.getenv("REDIS_URL", "redis://redis:6379"))
             await self.redis_client.ping()
             print("✅ Connected to Redis")
         except Exception as e:
@@ -42,7 +84,20 @@ class MarketDataGenerator:
             await self.connect()
     
     def generate_quote(self, symbol):
-        """Generate a realistic quote"""
+        """Generate a realistic quote (the top of the book when books are simulated)"""
+        book = self.books.get(symbol)
+        if book is not None and book.bids and book.asks:
+            (bid_price, bid_size), (ask_price, ask_size) = book.best()
+            return {
+                "type": "quote",
+                "symbol": symbol,
+                "bid_price": bid_price,
+                "ask_price": ask_price,
+                "bid_size": bid_size,
+                "ask_size": ask_size,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        
         base_price = self.base_prices[symbol]
         
         # Create bid-ask spread
@@ -50,12 +105,13 @@ class MarketDataGenerator:
         mid_price = base_price
         half_spread = mid_price * spread_percentage / 2
         
-        bid_price = round(mid_price - half_spread, 2)
-        ask_price = round(mid_price + half_spread, 2)
+        bid_price = self.round_to_tick(symbol, mid_price - half_spread)
+        ask_price = self.round_to_tick(symbol, mid_price + half_spread)
         
-        # Generate realistic sizes
-        bid_size = random.randint(1, 50) * 100
-        ask_size = random.randint(1, 50) * 100
+        # Generate realistic sizes, in whole lots
+        lot_size = self.instruments[symbol].lot_size
+        bid_size = random.randint(1, 50) * lot_size
+        ask_size = random.randint(1, 50) * lot_size
         
         return {
             "type": "quote",
@@ -73,11 +129,12 @@ class MarketDataGenerator:
         
         # Trade happens near the current price
         price_change = random.uniform(-0.001, 0.001)
-        trade_price = round(base_price * (1 + price_change), 2)
+        trade_price = self.round_to_tick(symbol, base_price * (1 + price_change))
         
         # Volume follows a power law distribution (most trades are small)
-        volume = int(random.paretovariate(1.5) * 100) * 100
-        volume = min(volume, 10000)  # Cap at 10,000 shares
+        lot_size = self.instruments[symbol].lot_size
+        volume = int(random.paretovariate(1.5) * 100) * lot_size
+        volume = min(volume, 100 * lot_size)  # Cap at 100 lots
         
         # Determine side based on price movement
         side = "BUY" if random.random() > 0.5 else "SELL"
@@ -91,10 +148,37 @@ class MarketDataGenerator:
             "timestamp": datetime.utcnow().isoformat()
         }
     
-    def update_price(self, symbol):
-        """Update base price with random walk"""
-        volatility = self.volatility[symbol]
-        change = random.gauss(0, volatility)
+    def generate_book(self, symbol):
+        """Move the symbol's book to the current price: level updates, or a periodic full snapshot"""
+        book = self.books[symbol]
+        mid_price = self.base_prices[symbol]
+        half_spread = mid_price * random.uniform(0.0001, 0.0005) / 2
+        updates = book.step(mid_price, half_spread)
+        
+        message = {"type": "book", "symbol": symbol}
+        if book.seq % self.book_snapshot_interval == 0:
+            message["snapshot"] = True
+            message.update(book.snapshot())
+        elif updates:
+            message["updates"] = updates
+        else:
+            return None
+        book.seq += 1
+        message["book_seq"] = book.seq
+        message["timestamp"] = datetime.utcnow().isoformat()
+        return message
+    
+    def round_to_tick(self, symbol, price):
+        tick, decimals = self.ticks[symbol]
+        return round(round(price / tick) * tick, decimals)
+    
+    def update_price(self, symbol, shock=None, regime=1.0):
+        """Update base price with random walk (``shock``: a correlated standard-normal draw)
+
+        ``regime`` scales the symbol's volatility for the current scenario phase.
+        """
+        volatility = self.volatility[symbol] * regime
+        change = random.gauss(0, volatility) if shock is None else volatility * shock
         
         # Add slight upward bias for bull market simulation
         bias = 0.0001
@@ -104,45 +188,99 @@ class MarketDataGenerator:
         self.base_prices[symbol] *= (1 + change)
         
         # Add occasional jumps (news events)
-        if random.random() < 0.001:  # 0.1% chance of jump
-            jump = random.uniform(-0.02, 0.02)  # ±2% jump
+        frame = self.frame
+        if random.random() < frame.jump_probability:
+            jump = random.uniform(-frame.jump_size, frame.jump_size)
             self.base_prices[symbol] *= (1 + jump)
             print(f"📰 News event! {symbol} jumped {jump*100:.2f}%")
     
+    def stamp(self, symbol, message):
+        """Stamp the per-symbol feed sequence and serialize for publishing"""
+        seq = self.sequences[symbol] + 1
+        self.sequences[symbol] = seq
+        message["source"] = self.source
+        message["feed_seq"] = seq
+        PUBLISHED_BY_TYPE[message["type"]].inc()
+        return json.dumps(message)
+    
+    @staticmethod
+    def channel(symbol, message):
+        """Book updates go to book:{symbol}, quotes and trades to market:{symbol}"""
+        return f"book:{symbol}" if message["type"] == "book" else f"market:{symbol}"
+    
+    async def publish(self, symbol, message):
+        """Publish one message to the symbol's channel"""
+        await self.redis_client.publish(self.channel(symbol, message), self.stamp(symbol, message))
+    
     async def generate_market_data(self):
         """Main loop to generate market data"""
         print("📊 Starting market data generation...")
-        print(f"📈 Generating data for: {', '.join(self.symbols)}")
+        shown = ', '.join(self.symbols[:10]) + (f" (+{len(self.symbols) - 10} more)" if len(self.symbols) > 10 else "")
+        print(f"📈 Generating data for: {shown}")
         
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        previous = None
         while self.running:
             try:
+                frame = self.frame = self.clock.frame()
+                for line in self.clock.transitions(previous, frame):
+                    print(line)
+                previous = frame
+                peak = frame.peak
+                SCENARIO_RATE.set(peak)
+                
+                # One pipelined round trip per sweep, however large the universe
+                pipe = self.redis_client.pipeline(transaction=False)
+                
+                # One vectorized draw per sweep when the walks are correlated
+                shocks = self.shocks.draw().tolist() if self.shocks else None
+                
                 # Generate data for each symbol
-                for symbol in self.symbols:
+                for i, symbol in enumerate(self.symbols):
+                    if symbol in frame.halted:
+                        continue
+                    # Sweeps run at the busiest symbol's rate; slower symbols sit some out
+                    rate = frame.rates.get(symbol, frame.rate)
+                    if rate < peak and random.random() * peak >= rate:
+                        continue
+                    jump = frame.jumps.get(symbol)
+                    if jump:
+                        self.base_prices[symbol] *= 1 + jump
+                    
+                    # Book first, so the quote below is its top of book
+                    if self.books:
+                        book = self.generate_book(symbol)
+                        if book is not None:
+                            pipe.publish(self.channel(symbol, book), self.stamp(symbol, book))
+                    
                     # Always generate quotes
                     quote = self.generate_quote(symbol)
-                    await self.redis_client.publish(
-                        f"market:{symbol}",
-                        json.dumps(quote)
-                    )
+                    pipe.publish(self.channel(symbol, quote), self.stamp(symbol, quote))
                     
-                    # Generate trades with varying probability
-                    # More trades during "market hours"
-                    trade_probability = 0.7
-                    if random.random() < trade_probability:
+                    # Trade probability follows the scenario phase
+                    if random.random() < frame.trade_probability:
                         trade = self.generate_trade(symbol)
-                        await self.redis_client.publish(
-                            f"market:{symbol}",
-                            json.dumps(trade)
-                        )
+                        pipe.publish(self.channel(symbol, trade), self.stamp(symbol, trade))
                         
                         # Update base price after trade
                         self.base_prices[symbol] = trade['price']
                     
                     # Random walk the price
-                    self.update_price(symbol)
+                    self.update_price(
+                        symbol, None if shocks is None else shocks[i], frame.volatilities.get(symbol, frame.volatility)
+                    )
+                
+                await pipe.execute()
                 
-                # Variable sleep to simulate market activity
-                await asyncio.sleep(random.uniform(0.1, 1.0))
+                # Sleep until the next sweep is due on the scenario clock. When the
+                # sweeps fall more than a second behind, give up on catching up.
+                self.clock.advance(frame)
+                delay = started + self.clock.elapsed - loop.time()
+                if delay < -1.0:
+                    started -= delay
+                    delay = 0.0
+                await asyncio.sleep(max(delay, 0.0))
                 
             except Exception as e:
                 print(f"❌ Error generating data: {e}")
@@ -160,9 +298,26 @@ class MarketDataGenerator:
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
         
+        # Expose Prometheus metrics (publish rate) on METRICS_PORT
+        start_http_server(int(os.getenv("METRICS_PORT", "9100")))
+        
+        # Always-on loop lag monitoring; profiling only behind ADMIN_TOKEN
+        loop_monitor = LoopLagMonitor(
+            float(os.getenv("LOOP_LAG_THRESHOLD", "0.1")), observe=EVENT_LOOP_LAG.observe
+        )
+        loop_monitor.start()
+        admin_token = os.getenv("ADMIN_TOKEN", "")
+        if admin_token:
+            admin_port = int(os.getenv("ADMIN_PORT", "9101"))
+            start_admin_server(admin_port, admin_token, SamplingProfiler(), loop_monitor)
+            print(f"🩺 Admin endpoints on port {admin_port}")
+        
         # Connect to Redis
         await self.connect()
         
+        seed = "unseeded" if self.scenario.seed is None else f"seed {self.scenario.seed}"
+        print(f"🎬 Scenario {self.scenario.name} ({seed})")
+        
         # Start generating market data
         await self.generate_market_data()
 
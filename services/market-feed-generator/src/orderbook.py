@@ -0,0 +1,77 @@
+"""
+Simulated level-2 order book.
+
+Each symbol keeps ``levels`` price levels per side on its tick grid, centred
+on the current price. Every sweep the book is moved to the new best bid and
+ask and the differences are returned as level updates:
+
+    ["add" | "modify" | "delete", "bid" | "ask", price, size]
+
+Levels that leave the window are deleted, new ones are added, and a share of
+the remaining levels get new sizes. Prices are kept as integer tick counts so
+levels compare exactly.
+"""
+from typing import Dict, List, Tuple
+import math
+import random
+
+from universe import Instrument
+
+# Chance that an existing level's size changes on a sweep
+MODIFY_PROBABILITY = 0.3
+
+
+class SimulatedBook:
+    def __init__(self, instrument: Instrument, levels: int):
+        self.tick = instrument.tick_size
+        self.decimals = instrument.decimals
+        self.lot_size = instrument.lot_size
+        self.levels = levels
+        # Price in ticks -> size
+        self.bids: Dict[int, int] = {}
+        self.asks: Dict[int, int] = {}
+        self.seq = 0
+
+    def price(self, ticks: int) -> float:
+        return round(ticks * self.tick, self.decimals)
+
+    def random_size(self, depth: int) -> int:
+        # Deeper levels rest more size
+        return random.randint(1, 20) * (1 + depth // 3) * self.lot_size
+
+    def step(self, mid: float, half_spread: float) -> List[list]:
+        """Move the book around ``mid`` and return the level updates"""
+        best_bid = math.floor((mid - half_spread) / self.tick + 1e-9)
+        best_ask = max(math.ceil((mid + half_spread) / self.tick - 1e-9), best_bid + 1)
+        updates = []
+        self._move(self.bids, "bid", range(best_bid, best_bid - self.levels, -1), updates)
+        self._move(self.asks, "ask", range(best_ask, best_ask + self.levels), updates)
+        return updates
+
+    def _move(self, side: Dict[int, int], name: str, window: range, updates: List[list]):
+        for ticks in [t for t in side if t not in window]:
+            del side[ticks]
+            updates.append(["delete", name, self.price(ticks), 0])
+        for depth, ticks in enumerate(window):
+            size = side.get(ticks)
+            if size is None:
+                side[ticks] = size = self.random_size(depth)
+                updates.append(["add", name, self.price(ticks), size])
+            elif random.random() < MODIFY_PROBABILITY:
+                new_size = self.random_size(depth)
+                if new_size != size:
+                    side[ticks] = new_size
+                    updates.append(["modify", name, self.price(ticks), new_size])
+
+    def best(self) -> Tuple[Tuple[float, int], Tuple[float, int]]:
+        """((bid price, size), (ask price, size))"""
+        bid = max(self.bids)
+        ask = min(self.asks)
+        return (self.price(bid), self.bids[bid]), (self.price(ask), self.asks[ask])
+
+    def snapshot(self) -> dict:
+        """Every level, best first, as ``[price, size]`` pairs"""
+        return {
+            "bids": [[self.price(t), self.bids[t]] for t in sorted(self.bids, reverse=True)],
+            "asks": [[self.price(t), self.asks[t]] for t in sorted(self.asks)],
+        }
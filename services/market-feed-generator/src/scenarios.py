@@ -0,0 +1,310 @@
+"""
+Scripted market scenarios.
+
+A scenario is a YAML timeline (``SCENARIO_FILE``) that shapes the feed over
+time instead of the flat default pace:
+
+    name: opening-bell
+    seed: 42                  # same seed, same feed (prices, sizes, timing)
+    duration: 600             # seconds; the timeline then repeats (loop: false holds the base)
+    base:
+      interval: [0.1, 1.0]    # seconds between sweeps, drawn uniformly
+      trade_probability: 0.7  # chance a symbol trades in a sweep
+      jump_probability: 0.001 # chance of a random news jump per symbol and sweep
+      jump_size: 0.02         # news jumps are uniform in ±jump_size
+    phases:                   # regimes; overlapping phases multiply
+      - {name: open, start: 0, end: 60, rate: 8, volatility: 3, trade_probability: 0.95}
+      - {name: lunch, start: 300, end: 420, rate: 0.2, volatility: 0.5}
+    events:
+      - {type: halt, at: 120, duration: 30, symbols: [TSLA]}
+      - {type: burst, at: 200, duration: 10, symbols: [AAPL, MSFT], rate: 20, volatility: 4, jump: -0.03}
+
+``rate`` multiplies how often a symbol publishes; ``volatility`` multiplies
+its random walk. A ``burst`` does both for its symbols (all symbols when
+``symbols`` is omitted) and moves them together by ``jump`` when it starts.
+A ``halt`` stops quotes, trades and price moves for its symbols.
+
+Scenario time advances by the drawn sweep intervals, not by the wall clock,
+so a seeded scenario publishes the same messages even when the generator
+falls behind its schedule. Without a file the built-in default reproduces
+the historical feed: every symbol every 0.1-1.0 s, 70% trade probability
+and 0.1% news jumps.
+"""
+from dataclasses import dataclass, field, replace
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+import os
+import random
+
+import yaml
+
+EVENT_TYPES = ("halt", "burst")
+
+
+@dataclass(frozen=True)
+class Regime:
+    interval: Tuple[float, float] = (0.1, 1.0)
+    trade_probability: float = 0.7
+    jump_probability: float = 0.001
+    jump_size: float = 0.02
+
+
+@dataclass(frozen=True)
+class Phase:
+    name: str
+    start: float
+    end: float
+    rate: float = 1.0
+    volatility: float = 1.0
+    trade_probability: Optional[float] = None
+    jump_probability: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class Event:
+    kind: str
+    at: float
+    duration: float
+    symbols: Optional[FrozenSet[str]] = None  # None: every symbol
+    rate: float = 1.0
+    volatility: float = 1.0
+    jump: float = 0.0
+
+    def covers(self, t: float) -> bool:
+        return self.at <= t < self.at + self.duration
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str = "default"
+    seed: Optional[int] = None
+    duration: float = 0.0
+    loop: bool = True
+    base: Regime = Regime()
+    phases: Tuple[Phase, ...] = ()
+    events: Tuple[Event, ...] = ()
+
+
+@dataclass
+class Frame:
+    """Settings in effect for one sweep"""
+    phase: str
+    rate: float
+    volatility: float
+    trade_probability: float
+    jump_probability: float
+    jump_size: float
+    # Per-symbol overrides while bursts and halts are active
+    rates: Dict[str, float] = field(default_factory=dict)
+    volatilities: Dict[str, float] = field(default_factory=dict)
+    halted: Set[str] = field(default_factory=set)
+    # One-off moves of bursts starting in this sweep
+    jumps: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def peak(self) -> float:
+        """Highest rate of any symbol; sweeps run at this rate and thin the rest"""
+        return max(self.rate, max(self.rates.values(), default=0.0))
+
+
+def _number(path: str, where: str, value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{path}: {where} must be a number, not {value!r}") from None
+
+
+def _required(path: str, where: str, entry, key: str):
+    if not isinstance(entry, dict):
+        raise ValueError(f"{path}: {where} must be a mapping")
+    if key not in entry:
+        raise ValueError(f"{path}: {where} is missing {key}")
+    return entry[key]
+
+
+def _positive(path: str, where: str, value, allow_zero: bool = False) -> float:
+    value = _number(path, where, value)
+    if value < 0 or (value == 0 and not allow_zero):
+        raise ValueError(f"{path}: {where} must be {'>= 0' if allow_zero else '> 0'}")
+    return value
+
+
+def _probability(path: str, where: str, value) -> float:
+    value = _number(path, where, value)
+    if not 0.0 <= value <= 1.0:
+        raise ValueError(f"{path}: {where} must be in [0, 1]")
+    return value
+
+
+def load_scenario(path: str, symbols: Sequence[str]) -> Scenario:
+    """Parse and validate a scenario file against the symbol universe"""
+    with open(path) as f:
+        data = yaml.safe_load(f) or {}
+    known = set(symbols)
+
+    base = data.get("base") or {}
+    interval = base.get("interval", Regime.interval)
+    if isinstance(interval, (int, float)):
+        interval = (interval, interval)
+    low, high = (_positive(path, "base.interval", v) for v in interval)
+    if low > high:
+        raise ValueError(f"{path}: base.interval must be [min, max]")
+    regime = Regime(
+        interval=(low, high),
+        trade_probability=_probability(path, "base.trade_probability", base.get("trade_probability", Regime.trade_probability)),
+        jump_probability=_probability(path, "base.jump_probability", base.get("jump_probability", Regime.jump_probability)),
+        jump_size=_positive(path, "base.jump_size", base.get("jump_size", Regime.jump_size), allow_zero=True),
+    )
+
+    phases = []
+    for i, entry in enumerate(data.get("phases") or []):
+        where = f"phases[{i}]"
+        end = _number(path, f"{where}.end", _required(path, where, entry, "end"))
+        start = _positive(path, f"{where}.start", entry.get("start", 0), allow_zero=True)
+        if end <= start:
+            raise ValueError(f"{path}: {where} ends before it starts")
+        phases.append(Phase(
+            name=str(entry.get("name", where)),
+            start=start,
+            end=end,
+            rate=_positive(path, f"{where}.rate", entry.get("rate", 1.0)),
+            volatility=_positive(path, f"{where}.volatility", entry.get("volatility", 1.0), allow_zero=True),
+            trade_probability=(
+                _probability(path, f"{where}.trade_probability", entry["trade_probability"])
+                if "trade_probability" in entry else None
+            ),
+            jump_probability=(
+                _probability(path, f"{where}.jump_probability", entry["jump_probability"])
+                if "jump_probability" in entry else None
+            ),
+        ))
+
+    events = []
+    for i, entry in enumerate(data.get("events") or []):
+        where = f"events[{i}]"
+        kind = _required(path, where, entry, "type")
+        if kind not in EVENT_TYPES:
+            raise ValueError(f"{path}: {where}.type must be one of {', '.join(EVENT_TYPES)}")
+        selected = None
+        if entry.get("symbols") is not None:
+            selected = frozenset(str(s).upper() for s in entry["symbols"])
+            unknown = sorted(selected - known)
+            if unknown:
+                raise ValueError(f"{path}: {where} lists unknown symbols {', '.join(unknown)}")
+        events.append(Event(
+            kind=kind,
+            at=_positive(path, f"{where}.at", entry.get("at", 0), allow_zero=True),
+            duration=_positive(path, f"{where}.duration", _required(path, where, entry, "duration")),
+            symbols=selected,
+            rate=_positive(path, f"{where}.rate", entry.get("rate", 1.0)),
+            volatility=_positive(path, f"{where}.volatility", entry.get("volatility", 1.0), allow_zero=True),
+            jump=_number(path, f"{where}.jump", entry.get("jump", 0.0)),
+        ))
+
+    ends = [p.end for p in phases] + [e.at + e.duration for e in events]
+    duration = _number(path, "duration", data.get("duration", max(ends, default=0.0)))
+    seed = data.get("seed")
+    return Scenario(
+        name=str(data.get("name", os.path.splitext(os.path.basename(path))[0])),
+        seed=None if seed is None else int(seed),
+        duration=duration,
+        loop=bool(data.get("loop", True)),
+        base=regime,
+        phases=tuple(phases),
+        events=tuple(events),
+    )
+
+
+def scenario_from_env(symbols: Sequence[str]) -> Scenario:
+    """Scenario configured by ``SCENARIO_FILE`` (default: the flat feed); ``SCENARIO_SEED`` overrides its seed"""
+    path = os.getenv("SCENARIO_FILE", "")
+    scenario = load_scenario(path, symbols) if path else Scenario()
+    seed = os.getenv("SCENARIO_SEED", "")
+    if seed:
+        scenario = replace(scenario, seed=int(seed))
+    return scenario
+
+
+class ScenarioClock:
+    """Walks a scenario's timeline one sweep at a time"""
+
+    def __init__(self, scenario: Scenario, symbols: Sequence[str]):
+        self.scenario = scenario
+        self.symbols = list(symbols)
+        self.elapsed = 0.0  # scenario seconds since start, across loops
+        self.cycle = 0
+        self.started: Set[int] = set()  # events of this cycle whose start has passed
+
+    @property
+    def offset(self) -> float:
+        """Position within the timeline"""
+        duration = self.scenario.duration
+        if duration <= 0:
+            return self.elapsed
+        if self.scenario.loop:
+            return self.elapsed % duration
+        return self.elapsed
+
+    def frame(self) -> Frame:
+        scenario = self.scenario
+        base = scenario.base
+        cycle = int(self.elapsed // scenario.duration) if scenario.loop and scenario.duration > 0 else 0
+        if cycle != self.cycle:
+            self.cycle = cycle
+            self.started.clear()
+        t = self.offset
+
+        frame = Frame("base", 1.0, 1.0, base.trade_probability, base.jump_probability, base.jump_size)
+        names = []
+        for phase in scenario.phases:
+            if phase.start <= t < phase.end:
+                names.append(phase.name)
+                frame.rate *= phase.rate
+                frame.volatility *= phase.volatility
+                if phase.trade_probability is not None:
+                    frame.trade_probability = phase.trade_probability
+                if phase.jump_probability is not None:
+                    frame.jump_probability = phase.jump_probability
+        if names:
+            frame.phase = "+".join(names)
+
+        for i, event in enumerate(scenario.events):
+            if not event.covers(t):
+                continue
+            selected = self.symbols if event.symbols is None else event.symbols
+            if event.kind == "halt":
+                frame.halted.update(selected)
+                continue
+            first = i not in self.started
+            for symbol in selected:
+                frame.rates[symbol] = frame.rates.get(symbol, frame.rate) * event.rate
+                frame.volatilities[symbol] = frame.volatilities.get(symbol, frame.volatility) * event.volatility
+                if first and event.jump:
+                    frame.jumps[symbol] = (1 + frame.jumps.get(symbol, 0.0)) * (1 + event.jump) - 1
+        for i, event in enumerate(scenario.events):
+            if event.covers(t):
+                self.started.add(i)
+        return frame
+
+    def advance(self, frame: Frame) -> float:
+        """Draw the time to the next sweep (shorter at higher rates) and move the clock"""
+        low, high = self.scenario.base.interval
+        interval = random.uniform(low, high) / frame.peak
+        self.elapsed += interval
+        return interval
+
+    def transitions(self, previous: Optional[Frame], frame: Frame) -> List[str]:
+        """Log lines for phases and halts that changed between two frames"""
+        lines = []
+        if previous is None or previous.phase != frame.phase:
+            lines.append(f"🎬 Scenario {self.scenario.name}: {frame.phase} (rate x{frame.rate:g}, volatility x{frame.volatility:g})")
+        before = previous.halted if previous is not None else set()
+        halted, resumed = frame.halted - before, before - frame.halted
+        if halted:
+            lines.append(f"⏸️ Halted {', '.join(sorted(halted))}")
+        if resumed:
+            lines.append(f"▶️ Resumed {', '.join(sorted(resumed))}")
+        if frame.jumps:
+            moves = ", ".join(f"{s} {j * 100:+.2f}%" for s, j in sorted(frame.jumps.items())[:10])
+            more = f" (+{len(frame.jumps) - 10} more)" if len(frame.jumps) > 10 else ""
+            lines.append(f"💥 Burst: {moves}{more}")
+        return lines
@@ -0,0 +1,79 @@
+"""
+Correlated price shocks.
+
+By default every symbol's random walk is independent. With a target
+correlation the generator draws one standard-normal shock per symbol per
+sweep, all at once, and scales it by the symbol's volatility:
+
+- ``CORRELATION_MATRIX_FILE``: a CSV correlation matrix (header
+  ``symbol,AAPL,MSFT,...``, then one row per symbol). Shocks are
+  ``L @ z`` with ``L`` the Cholesky factor of the matrix; symbols missing
+  from the file stay independent.
+- ``TARGET_CORRELATION``: one pairwise correlation ``rho`` for every pair.
+  That matrix is a single common factor, so the shock is drawn as
+  ``sqrt(rho) * f + sqrt(1 - rho) * e`` in O(N) rather than through an
+  N x N Cholesky factor.
+"""
+from typing import Optional, Sequence
+import csv
+import os
+
+import numpy as np
+
+
+class CorrelatedShocks:
+    def __init__(self, size: int, cholesky: Optional[np.ndarray] = None, rho: float = 0.0, seed: Optional[int] = None):
+        self.size = size
+        self.cholesky = cholesky
+        self.rho = rho
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray, seed: Optional[int] = None) -> "CorrelatedShocks":
+        try:
+            cholesky = np.linalg.cholesky(matrix)
+        except np.linalg.LinAlgError as e:
+            raise ValueError("correlation matrix is not positive definite") from e
+        return cls(len(matrix), cholesky=cholesky, seed=seed)
+
+    def draw(self) -> np.ndarray:
+        """One correlated standard-normal shock per symbol"""
+        z = self.rng.standard_normal(self.size)
+        if self.cholesky is not None:
+            return self.cholesky @ z
+        if self.rho:
+            return np.sqrt(self.rho) * self.rng.standard_normal() + np.sqrt(1.0 - self.rho) * z
+        return z
+
+
+def load_matrix(path: str, symbols: Sequence[str]) -> np.ndarray:
+    """Correlation matrix over ``symbols`` from a CSV; unlisted pairs are 0"""
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    matrix = np.eye(len(symbols))
+    with open(path, newline="") as f:
+        rows = csv.reader(f)
+        columns = [c.strip().upper() for c in next(rows)[1:]]
+        for row in rows:
+            i = index.get(row[0].strip().upper())
+            if i is None:
+                continue
+            for column, value in zip(columns, row[1:]):
+                j = index.get(column)
+                if j is not None and j != i:
+                    matrix[i, j] = float(value)
+    if not np.allclose(matrix, matrix.T):
+        raise ValueError(f"{path}: correlation matrix is not symmetric")
+    return matrix
+
+
+def shocks_from_env(symbols: Sequence[str], seed: Optional[int] = None) -> Optional[CorrelatedShocks]:
+    """Shock source configured by the environment, or None for independent walks"""
+    path = os.getenv("CORRELATION_MATRIX_FILE", "")
+    if path:
+        return CorrelatedShocks.from_matrix(load_matrix(path, symbols), seed)
+    rho = float(os.getenv("TARGET_CORRELATION", "0"))
+    if not 0.0 <= rho < 1.0:
+        raise ValueError("TARGET_CORRELATION must be in [0, 1)")
+    if rho:
+        return CorrelatedShocks(len(symbols), rho=rho, seed=seed)
+    return None
@@ -0,0 +1,132 @@
+"""
+Symbol universe registry.
+
+One CSV file (``SYMBOLS_FILE``) lists every instrument with the metadata the
+simulation needs:
+
+    symbol,name,start_price,volatility,tick_size,lot_size
+    AAPL,Apple Inc.,175.0,0.002,0.01,100
+
+Without a file the built-in five-symbol universe is used. Lookups go through
+a dict keyed by symbol; ``symbols`` keeps file order (most important first).
+
+Same module as services/api-gateway/src/universe.py (each service image is
+built from its own directory); keep the two in sync.
+
+To write a large synthetic universe (from the repository root):
+
+    python services/market-feed-generator/src/universe.py --count 10000 > config/symbols.csv
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+import argparse
+import csv
+import random
+import sys
+
+FIELDS = ("symbol", "name", "start_price", "volatility", "tick_size", "lot_size")
+
+
+@dataclass(frozen=True)
+class Instrument:
+    symbol: str
+    name: str
+    start_price: float
+    volatility: float
+    tick_size: float = 0.01
+    lot_size: int = 100
+
+    @property
+    def decimals(self) -> int:
+        """Decimal places needed to print a price on this tick grid"""
+        text = f"{self.tick_size:.10f}".rstrip("0")
+        return len(text.split(".")[1]) if "." in text else 0
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in FIELDS}
+
+
+DEFAULT_INSTRUMENTS = (
+    Instrument("AAPL", "Apple Inc.", 175.0, 0.002),
+    Instrument("GOOGL", "Alphabet Inc.", 140.0, 0.003),
+    Instrument("MSFT", "Microsoft Corp.", 380.0, 0.002),
+    Instrument("AMZN", "Amazon.com Inc.", 170.0, 0.003),
+    Instrument("TSLA", "Tesla Inc.", 240.0, 0.005),  # Tesla is more volatile
+)
+
+
+class SymbolRegistry:
+    def __init__(self, instruments: Iterable[Instrument]):
+        self.instruments: Dict[str, Instrument] = {}
+        for instrument in instruments:
+            if instrument.symbol in self.instruments:
+                raise ValueError(f"Duplicate symbol {instrument.symbol}")
+            self.instruments[instrument.symbol] = instrument
+        self.symbols: List[str] = list(self.instruments)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.instruments
+
+    def __len__(self) -> int:
+        return len(self.instruments)
+
+    def __iter__(self):
+        return iter(self.instruments.values())
+
+    def get(self, symbol: str) -> Optional[Instrument]:
+        return self.instruments.get(symbol)
+
+
+def parse_row(row: dict) -> Instrument:
+    return Instrument(
+        symbol=row["symbol"].strip().upper(),
+        name=(row.get("name") or "").strip() or row["symbol"].strip().upper(),
+        start_price=float(row["start_price"]),
+        volatility=float(row["volatility"]),
+        tick_size=float(row.get("tick_size") or 0.01),
+        lot_size=int(row.get("lot_size") or 100),
+    )
+
+
+def load_registry(path: str = "") -> SymbolRegistry:
+    """Registry from a CSV file, or the built-in universe when ``path`` is empty"""
+    if not path:
+        return SymbolRegistry(DEFAULT_INSTRUMENTS)
+    instruments = []
+    with open(path, newline="") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                instruments.append(parse_row(row))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"{path}:{line}: invalid instrument ({e})") from e
+    return SymbolRegistry(instruments)
+
+
+def synthetic_instruments(count: int, seed: int = 42) -> List[Instrument]:
+    """The default universe padded with deterministic synthetic instruments"""
+    rng = random.Random(seed)
+    instruments = list(DEFAULT_INSTRUMENTS[:count])
+    for i in range(len(instruments), count):
+        instruments.append(Instrument(
+            symbol=f"S{i:05d}",
+            name=f"Synthetic {i:05d}",
+            start_price=max(round(rng.lognormvariate(4.0, 1.0), 2), 1.0),
+            volatility=round(rng.uniform(0.001, 0.006), 4),
+            lot_size=rng.choice((1, 10, 100)),
+        ))
+    return instruments
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a symbol universe CSV to stdout")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    writer = csv.DictWriter(sys.stdout, fieldnames=FIELDS, lineterminator="\n")
+    writer.writeheader()
+    for instrument in synthetic_instruments(args.count, args.seed):
+        writer.writerow(instrument.to_dict())
+
+
+if __name__ == "__main__":
+    main()